@@ -0,0 +1,102 @@
+"""Concurrent-request throughput: blocking PyMongo vs AsyncMongoClient.
+
+Mounts two endpoints on a throwaway FastAPI app, one doing the old
+``MongoClient.find_one`` inside ``async def`` and one awaiting
+``AsyncMongoClient.find_one``, and fires concurrent requests at each
+through httpx's in-process ASGI transport.
+
+    python benchmarks/concurrent_requests.py --requests 200 --concurrency 50
+
+Uses MONGODB_URI / DATABASE_NAME like the API. Pass ``--simulate 80`` to
+replace the database call with an 80 ms sleep (blocking vs awaited) when no
+cluster is reachable. Requires httpx.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def build_app(simulate_ms: float) -> FastAPI:
+    app = FastAPI()
+
+    if simulate_ms:
+        delay = simulate_ms / 1000
+
+        @app.get("/sync")
+        async def sync_endpoint():
+            time.sleep(delay)
+            return {"ok": True}
+
+        @app.get("/async")
+        async def async_endpoint():
+            await asyncio.sleep(delay)
+            return {"ok": True}
+
+        return app
+
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+    from pymongo.server_api import ServerApi
+    from utils.mongodb import get_collection
+
+    load_dotenv()
+    sync_coll = MongoClient(
+        os.getenv("MONGODB_URI"),
+        server_api=ServerApi("1"),
+        tls=True,
+        tlsAllowInvalidCertificates=True,
+        serverSelectionTimeoutMS=5000
+    )[os.getenv("DATABASE_NAME")]["tareas"]
+    async_coll = get_collection("tareas")
+
+    @app.get("/sync")
+    async def sync_endpoint():
+        doc = sync_coll.find_one({}, {"_id": 1})
+        return {"ok": doc is not None}
+
+    @app.get("/async")
+    async def async_endpoint():
+        doc = await async_coll.find_one({}, {"_id": 1})
+        return {"ok": doc is not None}
+
+    return app
+
+
+async def run(client: httpx.AsyncClient, path: str, total: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            response = await client.get(path)
+            response.raise_for_status()
+
+    await client.get(path)
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--simulate", type=float, default=0, metavar="MS")
+    args = parser.parse_args()
+
+    app = build_app(args.simulate)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for label, path in (("before (sync PyMongo)", "/sync"), ("after (AsyncMongoClient)", "/async")):
+            elapsed = await run(client, path, args.requests, args.concurrency)
+            print(f"{label:26} {args.requests / elapsed:9.1f} req/s  ({elapsed:.2f}s for {args.requests} requests, concurrency {args.concurrency})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
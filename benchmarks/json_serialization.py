@@ -0,0 +1,80 @@
+"""JSON serialization time per 1k tareas, for each path a response can take.
+
+    python benchmarks/json_serialization.py --items 1000 --rounds 50
+
+Paths measured:
+
+* jsonable_encoder + json.dumps: untyped routes returning models or dicts
+* response_model (Pydantic dump_json): what FastAPI does for typed routes
+  with the default response class
+* response_model + app-wide response class: what typed routes would fall
+  back to if ``default_response_class`` were set on the app
+* model_dump_json joined per item: the old fields/cache bodies
+* models_json: utils.json_response, used now by fields and the response cache
+* MongoJSONResponse on raw documents: orjson with ObjectId/datetime handled
+  natively, no model in between
+
+No database needed: the documents are generated.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def tarea_documents(n: int) -> list[dict]:
+    now = datetime(2026, 1, 1)
+    return [{
+        "_id": ObjectId(),
+        "id_proyecto": ObjectId(),
+        "actividad": f"Actividad de ejemplo número {i} con algo de texto descriptivo",
+        "avance": float(i % 100),
+        "estado_tarea": ObjectId(),
+        "categoria_tarea": ObjectId(),
+        "importancia": 1 + i % 5,
+        "dificultad": "Media",
+        "fecha_creacion": now - timedelta(minutes=i),
+        "fecha_actualizacion": now,
+        "nombre_proyecto": "Proyecto",
+        "nombre_estado_tarea": "En curso",
+        "nombre_categoria_tarea": "General",
+    } for i in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    from models.tarea_detalle import TareaDetalle
+    from utils.json_response import MongoJSONResponse, json_dumps, models_json
+
+    documents = tarea_documents(args.items)
+    items = [TareaDetalle(**{**doc, "id": str(doc["_id"])}) for doc in documents]
+    adapter = TypeAdapter(list[TareaDetalle])
+
+    paths = (
+        ("jsonable_encoder + json.dumps", lambda: json.dumps(jsonable_encoder(items)).encode("utf-8")),
+        ("response_model (dump_json)", lambda: adapter.dump_json(items)),
+        ("response_model + app class", lambda: json_dumps(adapter.dump_python(items, mode="json"))),
+        ("model_dump_json joined", lambda: ("[" + ",".join(item.model_dump_json() for item in items) + "]").encode("utf-8")),
+        ("models_json", lambda: models_json(items)),
+        ("MongoJSONResponse raw docs", lambda: MongoJSONResponse(documents).body),
+    )
+    scale = 1000 / args.items
+    for label, serialize in paths:
+        elapsed = timeit.timeit(serialize, number=args.rounds) / args.rounds
+        print(f"{label:30} {elapsed * 1000 * scale:8.2f} ms per 1k tareas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Login throughput: blocking ``requests.post`` vs the shared async HTTP client.
+
+Starts a fake identitytoolkit server on localhost (``accounts:signInWithPassword``
+answering after ``--latency`` ms), then mounts two endpoints on a throwaway
+FastAPI app doing the Firebase half of ``login()``: one with the old
+per-call ``requests.post`` inside ``async def`` and one through
+``utils.http_client.request_with_retry``. Concurrent requests are fired at
+each through httpx's in-process ASGI transport.
+
+    python benchmarks/login_throughput.py --requests 200 --concurrency 50 --latency 40
+
+No network or Firebase project needed. To point the real API at the fake,
+run it with ``--serve`` and set FIREBASE_AUTH_URL=http://127.0.0.1:PORT/v1.
+Requires httpx, requests and uvicorn.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+
+import httpx
+import requests
+import uvicorn
+from fastapi import FastAPI, Request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def build_fake_identitytoolkit(latency_ms: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/v1/accounts:signInWithPassword")
+    async def sign_in(request: Request):
+        body = await request.json()
+        await asyncio.sleep(latency_ms / 1000)
+        if body.get("password") == "wrong":
+            return {"error": {"code": 400, "message": "INVALID_PASSWORD"}}
+        return {"kind": "identitytoolkit#VerifyPasswordResponse", "email": body.get("email"), "idToken": "fake", "registered": True}
+
+    return app
+
+
+def serve_in_thread(app: FastAPI) -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}/v1"
+
+
+def build_app(auth_url: str) -> FastAPI:
+    from utils.http_client import request_with_retry
+
+    app = FastAPI()
+    url = f"{auth_url}/accounts:signInWithPassword"
+    payload = {"email": "bench@example.com", "password": "secret", "returnSecureToken": True}
+
+    @app.post("/sync")
+    async def sync_login():
+        response = requests.post(url, params={"key": "fake"}, json=payload)
+        return {"ok": "error" not in response.json()}
+
+    @app.post("/async")
+    async def async_login():
+        response = await request_with_retry("POST", url, params={"key": "fake"}, json=payload)
+        return {"ok": "error" not in response.json()}
+
+    return app
+
+
+async def run(client: httpx.AsyncClient, path: str, total: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            response = await client.post(path)
+            response.raise_for_status()
+
+    await client.post(path)
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=40, metavar="MS")
+    parser.add_argument("--serve", action="store_true", help="only run the fake identitytoolkit server")
+    args = parser.parse_args()
+
+    auth_url = serve_in_thread(build_fake_identitytoolkit(args.latency))
+    if args.serve:
+        print(f"Fake identitytoolkit listening; FIREBASE_AUTH_URL={auth_url}")
+        await asyncio.Event().wait()
+
+    from utils.http_client import close_http_client
+
+    transport = httpx.ASGITransport(app=build_app(auth_url))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for label, path in (("before (requests.post)", "/sync"), ("after (pooled httpx)", "/async")):
+            elapsed = await run(client, path, args.requests, args.concurrency)
+            print(f"{label:24} {args.requests / elapsed:9.1f} req/s  ({elapsed:.2f}s for {args.requests} requests, concurrency {args.concurrency})")
+    await close_http_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
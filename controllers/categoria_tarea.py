@@ -1,45 +1,52 @@
 from models.categoria_tarea import CategoriaTarea
 from utils.mongodb import get_collection
+from utils.read_routing import current_session
+from utils.pagination import parse_sort
+from utils.catalog_cache import CatalogCache, sort_items
+from utils.response_cache import bump_generation
 from fastapi import HTTPException
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from bson import ObjectId
+from datetime import datetime
 
 coll = get_collection("categorias_tarea")
+categorias_tarea_cache = CatalogCache("categorias_tarea", CategoriaTarea, "nombre_categoria")
+
+CATEGORIA_TAREA_SORT_FIELDS = {"nombre_categoria"}
 
 async def create_categoria_tarea(categoria_tarea: CategoriaTarea) -> CategoriaTarea:
     try:
         categoria_tarea.nombre_categoria = categoria_tarea.nombre_categoria.strip().lower()
 
-        existing_category = coll.find_one({"nombre_categoria": categoria_tarea.nombre_categoria})
-        if existing_category:
-            raise HTTPException(status_code=400, detail="Task category with this name already exists")
-
         categoria_tarea_dict = categoria_tarea.model_dump(exclude={"id"})
-        inserted = coll.insert_one(categoria_tarea_dict)
+        categoria_tarea_dict["fecha_actualizacion"] = datetime.now()
+        inserted = await coll.insert_one(categoria_tarea_dict, session=current_session())
+        categorias_tarea_cache.invalidate()
+        await bump_generation("categorias_tarea")
         categoria_tarea.id = str(inserted.inserted_id)
         return categoria_tarea
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Task category with this name already exists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating task category: {str(e)}")
 
-async def get_categorias_tarea() -> list[CategoriaTarea]:
+async def get_categorias_tarea(skip: int = 0, limit: int = 50, sort: str = "nombre_categoria") -> list[CategoriaTarea]:
+    sort_spec = parse_sort(sort, CATEGORIA_TAREA_SORT_FIELDS)
     try:
-        categorias_tarea = []
-        for doc in coll.find():
-            doc['id'] = str(doc['_id'])
-            del doc['_id']
-            categorias_tarea.append(CategoriaTarea(**doc))
-        return categorias_tarea
+        categorias_tarea = sort_items(await categorias_tarea_cache.all(), sort_spec)
+        return categorias_tarea[skip:skip + limit]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching task categories: {str(e)}")
 
 async def get_categoria_tarea_by_id(categoria_tarea_id: str) -> CategoriaTarea:
     try:
-        doc = coll.find_one({"_id": ObjectId(categoria_tarea_id)})
-        if not doc:
+        item = await categorias_tarea_cache.get(categoria_tarea_id)
+        if item is None:
             raise HTTPException(status_code=404, detail="Task category not found")
-
-        doc['id'] = str(doc['_id'])
-        del doc['_id']
-        return CategoriaTarea(**doc)
+        return item
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching task category: {str(e)}")
 
@@ -47,28 +54,36 @@ async def update_categoria_tarea(categoria_tarea_id: str, categoria_tarea: Categ
     try:
         categoria_tarea.nombre_categoria = categoria_tarea.nombre_categoria.strip().lower()
 
-        existing_category = coll.find_one({"nombre_categoria": categoria_tarea.nombre_categoria, "_id": {"$ne": ObjectId(categoria_tarea_id)}})
-        if existing_category:
-            raise HTTPException(status_code=400, detail="Task category with this name already exists")
-
-        result = coll.update_one(
+        doc = await coll.find_one_and_update(
             {"_id": ObjectId(categoria_tarea_id)},
-            {"$set": categoria_tarea.model_dump(exclude={"id"})}
+            {"$set": {**categoria_tarea.model_dump(exclude={"id"}), "fecha_actualizacion": datetime.now()}},
+            return_document=ReturnDocument.AFTER,
+            session=current_session()
         )
-        if result.modified_count == 0:
-            if coll.find_one({"_id": ObjectId(categoria_tarea_id)}) is None:
-                raise HTTPException(status_code=404, detail="Task category not found")
-            return await get_categoria_tarea_by_id(categoria_tarea_id)
-        
-        return await get_categoria_tarea_by_id(categoria_tarea_id)
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Task category not found")
+        categorias_tarea_cache.invalidate()
+        await bump_generation("categorias_tarea")
+
+        doc['id'] = str(doc['_id'])
+        del doc['_id']
+        return CategoriaTarea(**doc)
+    except HTTPException:
+        raise
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Task category with this name already exists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating task category: {str(e)}")
 
 async def delete_categoria_tarea(categoria_tarea_id: str):
     try:
-        result = coll.delete_one({"_id": ObjectId(categoria_tarea_id)})
+        result = await coll.delete_one({"_id": ObjectId(categoria_tarea_id)}, session=current_session())
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Task category not found")
+        categorias_tarea_cache.invalidate()
+        await bump_generation("categorias_tarea")
         return {"message": "Task category deleted successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting task category: {str(e)}")
\ No newline at end of file
@@ -1,74 +1,105 @@
 from models.estado_proyecto import EstadoProyecto
 from utils.mongodb import get_collection
+from utils.read_routing import current_session
+from utils.pagination import parse_sort
+from utils.catalog_cache import CatalogCache, sort_items
+from utils.response_cache import bump_generation
 from fastapi import HTTPException
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from bson import ObjectId
+from datetime import datetime
 
 coll = get_collection("estados_proyecto")
+estados_proyecto_cache = CatalogCache("estados_proyecto", EstadoProyecto, "nombre_estado")
+
+ESTADO_PROYECTO_SORT_FIELDS = {"nombre_estado"}
 
 async def create_estado_proyecto(estado_proyecto: EstadoProyecto) -> EstadoProyecto:
     try:
         estado_proyecto.nombre_estado = estado_proyecto.nombre_estado.strip().lower()
 
-        existing_state = coll.find_one({"nombre_estado": estado_proyecto.nombre_estado})
-        if existing_state:
-            raise HTTPException(status_code=400, detail="Project state with this name already exists")
-
         estado_proyecto_dict = estado_proyecto.model_dump(exclude={"id"})
-        inserted = coll.insert_one(estado_proyecto_dict)
+        estado_proyecto_dict["fecha_actualizacion"] = datetime.now()
+        inserted = await coll.insert_one(estado_proyecto_dict, session=current_session())
+        estados_proyecto_cache.invalidate()
+        await bump_generation("estados_proyecto")
         estado_proyecto.id = str(inserted.inserted_id)
         return estado_proyecto
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Project state with this name already exists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating project state: {str(e)}")
 
-async def get_estados_proyecto() -> list[EstadoProyecto]:
+async def get_estados_proyecto(skip: int = 0, limit: int = 50, sort: str = "nombre_estado") -> list[EstadoProyecto]:
+    sort_spec = parse_sort(sort, ESTADO_PROYECTO_SORT_FIELDS)
     try:
-        estados_proyecto = []
-        for doc in coll.find():
-            doc['id'] = str(doc['_id'])
-            del doc['_id']
-            estados_proyecto.append(EstadoProyecto(**doc))
-        return estados_proyecto
+        estados_proyecto = sort_items(await estados_proyecto_cache.all(), sort_spec)
+        return estados_proyecto[skip:skip + limit]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching project states: {str(e)}")
 
 async def get_estado_proyecto_by_id(estado_proyecto_id: str) -> EstadoProyecto:
     try:
-        doc = coll.find_one({"_id": ObjectId(estado_proyecto_id)})
-        if not doc:
+        item = await estados_proyecto_cache.get(estado_proyecto_id)
+        if item is None:
             raise HTTPException(status_code=404, detail="Project state not found")
-
-        doc['id'] = str(doc['_id'])
-        del doc['_id']
-        return EstadoProyecto(**doc)
+        return item
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching project state: {str(e)}")
 
+async def get_estado_proyecto_id(nombre_estado: str) -> ObjectId:
+    # Resolves a state by name, creating it if the catalog does not have it yet
+    cached_id = await estados_proyecto_cache.id_for(nombre_estado)
+    if cached_id:
+        return ObjectId(cached_id)
+    doc = await coll.find_one_and_update(
+        {"nombre_estado": nombre_estado},
+        {"$setOnInsert": {"nombre_estado": nombre_estado, "descripcion": "", "fecha_actualizacion": datetime.now()}},
+        projection={"_id": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+        session=current_session()
+    )
+    estados_proyecto_cache.invalidate()
+    return doc["_id"]
+
 async def update_estado_proyecto(estado_proyecto_id: str, estado_proyecto: EstadoProyecto) -> EstadoProyecto:
     try:
         estado_proyecto.nombre_estado = estado_proyecto.nombre_estado.strip().lower()
 
-        existing_state = coll.find_one({"nombre_estado": estado_proyecto.nombre_estado, "_id": {"$ne": ObjectId(estado_proyecto_id)}})
-        if existing_state:
-            raise HTTPException(status_code=400, detail="Project state with this name already exists")
-
-        result = coll.update_one(
+        doc = await coll.find_one_and_update(
             {"_id": ObjectId(estado_proyecto_id)},
-            {"$set": estado_proyecto.model_dump(exclude={"id"})}
+            {"$set": {**estado_proyecto.model_dump(exclude={"id"}), "fecha_actualizacion": datetime.now()}},
+            return_document=ReturnDocument.AFTER,
+            session=current_session()
         )
-        if result.modified_count == 0:
-            if coll.find_one({"_id": ObjectId(estado_proyecto_id)}) is None:
-                raise HTTPException(status_code=404, detail="Project state not found")
-            return await get_estado_proyecto_by_id(estado_proyecto_id)
-        
-        return await get_estado_proyecto_by_id(estado_proyecto_id)
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Project state not found")
+        estados_proyecto_cache.invalidate()
+        await bump_generation("estados_proyecto")
+
+        doc['id'] = str(doc['_id'])
+        del doc['_id']
+        return EstadoProyecto(**doc)
+    except HTTPException:
+        raise
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Project state with this name already exists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating project state: {str(e)}")
 
 async def delete_estado_proyecto(estado_proyecto_id: str):
     try:
-        result = coll.delete_one({"_id": ObjectId(estado_proyecto_id)})
+        result = await coll.delete_one({"_id": ObjectId(estado_proyecto_id)}, session=current_session())
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Project state not found")
+        estados_proyecto_cache.invalidate()
+        await bump_generation("estados_proyecto")
         return {"message": "Project state deleted successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting project state: {str(e)}")
\ No newline at end of file
@@ -1,74 +1,105 @@
 from models.estado_tarea import EstadoTarea
 from utils.mongodb import get_collection
+from utils.read_routing import current_session
+from utils.pagination import parse_sort
+from utils.catalog_cache import CatalogCache, sort_items
+from utils.response_cache import bump_generation
 from fastapi import HTTPException
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from bson import ObjectId
+from datetime import datetime
 
 coll = get_collection("estados_tarea")
+estados_tarea_cache = CatalogCache("estados_tarea", EstadoTarea, "nombre_estado")
+
+ESTADO_TAREA_SORT_FIELDS = {"nombre_estado"}
 
 async def create_estado_tarea(estado_tarea: EstadoTarea) -> EstadoTarea:
     try:
         estado_tarea.nombre_estado = estado_tarea.nombre_estado.strip().lower()
 
-        existing_state = coll.find_one({"nombre_estado": estado_tarea.nombre_estado})
-        if existing_state:
-            raise HTTPException(status_code=400, detail="Task state with this name already exists")
-
         estado_tarea_dict = estado_tarea.model_dump(exclude={"id"})
-        inserted = coll.insert_one(estado_tarea_dict)
+        estado_tarea_dict["fecha_actualizacion"] = datetime.now()
+        inserted = await coll.insert_one(estado_tarea_dict, session=current_session())
+        estados_tarea_cache.invalidate()
+        await bump_generation("estados_tarea")
         estado_tarea.id = str(inserted.inserted_id)
         return estado_tarea
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Task state with this name already exists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating task state: {str(e)}")
 
-async def get_estados_tarea() -> list[EstadoTarea]:
+async def get_estados_tarea(skip: int = 0, limit: int = 50, sort: str = "nombre_estado") -> list[EstadoTarea]:
+    sort_spec = parse_sort(sort, ESTADO_TAREA_SORT_FIELDS)
     try:
-        estados_tarea = []
-        for doc in coll.find():
-            doc['id'] = str(doc['_id'])
-            del doc['_id']
-            estados_tarea.append(EstadoTarea(**doc))
-        return estados_tarea
+        estados_tarea = sort_items(await estados_tarea_cache.all(), sort_spec)
+        return estados_tarea[skip:skip + limit]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching task states: {str(e)}")
 
 async def get_estado_tarea_by_id(estado_tarea_id: str) -> EstadoTarea:
     try:
-        doc = coll.find_one({"_id": ObjectId(estado_tarea_id)})
-        if not doc:
+        item = await estados_tarea_cache.get(estado_tarea_id)
+        if item is None:
             raise HTTPException(status_code=404, detail="Task state not found")
-
-        doc['id'] = str(doc['_id'])
-        del doc['_id']
-        return EstadoTarea(**doc)
+        return item
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching task state: {str(e)}")
 
+async def get_estado_tarea_id(nombre_estado: str) -> ObjectId:
+    # Resolves a state by name, creating it if the catalog does not have it yet
+    cached_id = await estados_tarea_cache.id_for(nombre_estado)
+    if cached_id:
+        return ObjectId(cached_id)
+    doc = await coll.find_one_and_update(
+        {"nombre_estado": nombre_estado},
+        {"$setOnInsert": {"nombre_estado": nombre_estado, "descripcion": "", "fecha_actualizacion": datetime.now()}},
+        projection={"_id": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+        session=current_session()
+    )
+    estados_tarea_cache.invalidate()
+    return doc["_id"]
+
 async def update_estado_tarea(estado_tarea_id: str, estado_tarea: EstadoTarea) -> EstadoTarea:
     try:
         estado_tarea.nombre_estado = estado_tarea.nombre_estado.strip().lower()
 
-        existing_state = coll.find_one({"nombre_estado": estado_tarea.nombre_estado, "_id": {"$ne": ObjectId(estado_tarea_id)}})
-        if existing_state:
-            raise HTTPException(status_code=400, detail="Task state with this name already exists")
-
-        result = coll.update_one(
+        doc = await coll.find_one_and_update(
             {"_id": ObjectId(estado_tarea_id)},
-            {"$set": estado_tarea.model_dump(exclude={"id"})}
+            {"$set": {**estado_tarea.model_dump(exclude={"id"}), "fecha_actualizacion": datetime.now()}},
+            return_document=ReturnDocument.AFTER,
+            session=current_session()
         )
-        if result.modified_count == 0:
-            if coll.find_one({"_id": ObjectId(estado_tarea_id)}) is None:
-                raise HTTPException(status_code=404, detail="Task state not found")
-            return await get_estado_tarea_by_id(estado_tarea_id)
-        
-        return await get_estado_tarea_by_id(estado_tarea_id)
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Task state not found")
+        estados_tarea_cache.invalidate()
+        await bump_generation("estados_tarea")
+
+        doc['id'] = str(doc['_id'])
+        del doc['_id']
+        return EstadoTarea(**doc)
+    except HTTPException:
+        raise
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Task state with this name already exists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating task state: {str(e)}")
 
 async def delete_estado_tarea(estado_tarea_id: str):
     try:
-        result = coll.delete_one({"_id": ObjectId(estado_tarea_id)})
+        result = await coll.delete_one({"_id": ObjectId(estado_tarea_id)}, session=current_session())
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Task state not found")
+        estados_tarea_cache.invalidate()
+        await bump_generation("estados_tarea")
         return {"message": "Task state deleted successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting task state: {str(e)}")
\ No newline at end of file
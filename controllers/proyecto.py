@@ -1,85 +1,122 @@
 from models.proyecto import Proyecto
+from models.proyecto_detalle import ProyectoDetalle
+from models.object_id import foreign_keys_to_object_id
 from utils.mongodb import get_collection
+from utils.read_routing import reader, current_session
+from utils.adapters import validate_many
+from utils.response_cache import bump_generation
+from pipelines.proyecto_pipelines import get_proyectos_with_estado_pipeline, get_proyecto_by_id_with_estado_pipeline, get_proyecto_version_pipeline
+from utils.pagination import parse_sort
+from utils.fields import parse_fields, partial_model
+from controllers.estado_proyecto import get_estado_proyecto_id
 from fastapi import HTTPException
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from bson import ObjectId
+from typing import Optional
 from datetime import datetime
 
 coll = get_collection("proyectos")
 
+PROYECTO_FOREIGN_KEYS = ("estado",)
+PROYECTO_SORT_FIELDS = {"nombre_proyecto", "fecha_creacion", "fecha_actualizacion", "estado"}
+
 async def create_proyecto(proyecto: Proyecto) -> Proyecto:
     try:
         proyecto.nombre_proyecto = proyecto.nombre_proyecto.strip()
 
-        existing_project = coll.find_one({"nombre_proyecto": proyecto.nombre_proyecto})
-        if existing_project:
-            raise HTTPException(status_code=400, detail="Project with this name already exists")
-        
-        proyecto_dict = proyecto.model_dump(exclude={"id"})
+        proyecto_dict = foreign_keys_to_object_id(proyecto.model_dump(exclude={"id"}), PROYECTO_FOREIGN_KEYS)
         proyecto_dict["fecha_creacion"] = proyecto.fecha_creacion
         proyecto_dict["fecha_actualizacion"] = proyecto.fecha_actualizacion
         
-        inserted = coll.insert_one(proyecto_dict)
+        inserted = await coll.insert_one(proyecto_dict, session=current_session())
+        await bump_generation("proyectos")
         proyecto.id = str(inserted.inserted_id)
         return proyecto
+    except HTTPException:
+        raise
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Project with this name already exists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating project: {str(e)}")
 
-async def get_proyectos() -> list[Proyecto]:
+async def get_proyectos(skip: int = 0, limit: int = 50, sort: str = "-fecha_creacion", fields: Optional[str] = None) -> list[ProyectoDetalle]:
+    sort_spec = parse_sort(sort, PROYECTO_SORT_FIELDS)
+    selected = parse_fields(fields, ProyectoDetalle, [field for field, _ in sort_spec])
+    model = partial_model(ProyectoDetalle, selected) if selected else ProyectoDetalle
     try:
-        proyectos = []
-        for doc in coll.find():
-            doc['id'] = str(doc['_id'])
-            del doc['_id']
-            proyectos.append(Proyecto(**doc))
-        return proyectos
+        cursor = await reader(coll).aggregate(get_proyectos_with_estado_pipeline(sort=sort_spec, skip=skip, limit=limit, fields=selected), session=current_session())
+        return validate_many(model, await cursor.to_list(None))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching projects: {str(e)}")
 
-async def get_proyecto_by_id(proyecto_id: str) -> Proyecto:
+async def get_proyecto_by_id(proyecto_id: str) -> ProyectoDetalle:
     try:
-        doc = coll.find_one({"_id": ObjectId(proyecto_id)})
-        if not doc:
+        cursor = await reader(coll).aggregate(get_proyecto_by_id_with_estado_pipeline(proyecto_id), session=current_session())
+        docs = await cursor.to_list(1)
+        if not docs:
             raise HTTPException(status_code=404, detail="Project not found")
 
-        doc['id'] = str(doc['_id'])
-        del doc['_id']
-        return Proyecto(**doc)
+        return ProyectoDetalle(**docs[0])
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching project: {str(e)}")
 
+async def get_proyecto_version(proyecto_id: str) -> Optional[list]:
+    if not ObjectId.is_valid(proyecto_id):
+        return None
+    try:
+        cursor = await reader(coll).aggregate(get_proyecto_version_pipeline(proyecto_id), session=current_session())
+        docs = await cursor.to_list(1)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching project: {str(e)}")
+    return docs[0]["versiones"] if docs else None
+
 async def update_proyecto(proyecto_id: str, proyecto: Proyecto) -> Proyecto:
     try:
         proyecto.nombre_proyecto = proyecto.nombre_proyecto.strip()
 
-        existing_project = coll.find_one({"nombre_proyecto": proyecto.nombre_proyecto, "_id": {"$ne": ObjectId(proyecto_id)}})
-        if existing_project:
-            raise HTTPException(status_code=400, detail="Project with this name already exists")
-
-        proyecto_dict = proyecto.model_dump(exclude={"id"})
+        proyecto_dict = foreign_keys_to_object_id(proyecto.model_dump(exclude={"id"}), PROYECTO_FOREIGN_KEYS)
         proyecto_dict["fecha_actualizacion"] = datetime.now()
-        
-        result = coll.update_one(
+
+        doc = await coll.find_one_and_update(
             {"_id": ObjectId(proyecto_id)},
-            {"$set": proyecto_dict}
+            {"$set": proyecto_dict},
+            return_document=ReturnDocument.AFTER,
+            session=current_session()
         )
-        if result.modified_count == 0:
-            if coll.find_one({"_id": ObjectId(proyecto_id)}) is None:
-                raise HTTPException(status_code=404, detail="Project not found")
-            return await get_proyecto_by_id(proyecto_id)
-        
-        return await get_proyecto_by_id(proyecto_id)
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        await bump_generation("proyectos")
+
+        doc['id'] = str(doc['_id'])
+        del doc['_id']
+        return Proyecto(**doc)
+    except HTTPException:
+        raise
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Project with this name already exists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating project: {str(e)}")
 
 async def deactivate_proyecto(proyecto_id: str) -> Proyecto:
     try:
-        result = coll.update_one(
+        estado_id = await get_estado_proyecto_id("desactivado")
+        doc = await coll.find_one_and_update(
             {"_id": ObjectId(proyecto_id)},
-            {"$set": {"estado": "desactivado"}}
+            {"$set": {"estado": estado_id, "fecha_actualizacion": datetime.now()}},
+            return_document=ReturnDocument.AFTER,
+            session=current_session()
         )
-        if result.modified_count == 0:
+        if doc is None:
             raise HTTPException(status_code=404, detail="Project not found")
+        await bump_generation("proyectos")
 
-        return await get_proyecto_by_id(proyecto_id)
+        doc['id'] = str(doc['_id'])
+        del doc['_id']
+        return Proyecto(**doc)
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error deactivating project: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error deactivating project: {str(e)}")
@@ -1,74 +1,129 @@
 from models.rol import Rol
 from utils.mongodb import get_collection
+from utils.read_routing import current_session
+from utils.pagination import parse_sort
+from utils.catalog_cache import CatalogCache, sort_items
+from utils.response_cache import bump_generation
+from utils.permissions import compile_permissions, default_permissions, missing_permissions
 from fastapi import HTTPException
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from bson import ObjectId
+from datetime import datetime
 
 coll = get_collection("roles")
+roles_cache = CatalogCache("roles", Rol, "nombre_rol")
 
-async def create_rol(rol: Rol) -> Rol:
-    try:
-        rol.nombre_rol = rol.nombre_rol.strip().lower()
-
-        existing_rol = coll.find_one({"nombre_rol": rol.nombre_rol})
-        if existing_rol:
-            raise HTTPException(status_code=400, detail="Rol with this name already exists")
+ROL_SORT_FIELDS = {"nombre_rol"}
 
+async def create_rol(rol: Rol, caller_permisos: int) -> Rol:
+    rol.nombre_rol = rol.nombre_rol.strip().lower()
+    check_grant(rol_permissions(rol), caller_permisos)
+    try:
         rol_dict = rol.model_dump(exclude={"id"})
-        inserted = coll.insert_one(rol_dict)
+        rol_dict["version"] = 0
+        rol_dict["fecha_actualizacion"] = datetime.now()
+        inserted = await coll.insert_one(rol_dict, session=current_session())
+        roles_cache.invalidate()
+        await bump_generation("roles")
         rol.id = str(inserted.inserted_id) 
+        rol.version = 0
         return rol
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Rol with this name already exists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating rol: {str(e)}")
 
-async def get_roles() -> list[Rol]:
+async def get_roles(skip: int = 0, limit: int = 50, sort: str = "nombre_rol") -> list[Rol]:
+    sort_spec = parse_sort(sort, ROL_SORT_FIELDS)
     try:
-        roles = []
-        for doc in coll.find():
-            doc['id'] = str(doc['_id'])
-            del doc['_id']
-            roles.append(Rol(**doc))
-        return roles
+        roles = sort_items(await roles_cache.all(), sort_spec)
+        return roles[skip:skip + limit]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching roles: {str(e)}")
 
 async def get_rol_by_id(rol_id: str) -> Rol:
     try:
-        doc = coll.find_one({"_id": ObjectId(rol_id)})
-        if not doc:
+        item = await roles_cache.get(rol_id)
+        if item is None:
             raise HTTPException(status_code=404, detail="Rol not found")
-
-        doc['id'] = str(doc['_id'])
-        del doc['_id']
-        return Rol(**doc)
+        return item
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching rol: {str(e)}")
 
-async def update_rol(rol_id: str, rol: Rol) -> Rol:
-    try:
-        rol.nombre_rol = rol.nombre_rol.strip().lower()
+def rol_permissions(rol: Rol) -> int:
+    if rol.permisos is None:
+        return default_permissions(rol.nombre_rol)
+    return compile_permissions(rol.permisos)
+
+async def get_rol_claims(rol_id) -> dict:
+    # Role claims for a new token: name, permission bitmask and the version they come from
+    if not rol_id:
+        return {"rol": "", "permisos": 0}
+    if isinstance(rol_id, str) and not ObjectId.is_valid(rol_id):
+        # rol still stored by name (not migrated to ObjectId yet)
+        return {"rol": rol_id, "permisos": default_permissions(rol_id)}
+    rol = await roles_cache.get(str(rol_id))
+    if rol is None:
+        return {"rol": "", "permisos": 0}
+    return {"rol": rol.nombre_rol, "permisos": rol_permissions(rol), "rol_id": rol.id, "rol_version": rol.version}
 
-        existing_rol = coll.find_one({"nombre_rol": rol.nombre_rol, "_id": {"$ne": ObjectId(rol_id)}})
-        if existing_rol:
-            raise HTTPException(status_code=400, detail="Rol with this name already exists")
+def check_grant(mask: int, caller_permisos: int):
+    # Nobody hands out, or takes away from others, more than they hold themselves
+    missing = missing_permissions(mask, caller_permisos)
+    if missing:
+        raise HTTPException(status_code=403, detail=f"Cannot grant or change permissions you do not hold: {', '.join(missing)}")
 
-        result = coll.update_one(
+async def check_rol_assignable(rol_id, caller_permisos: int):
+    check_grant((await get_rol_claims(rol_id))["permisos"], caller_permisos)
+
+async def _check_current_rol(rol_id: str, caller_permisos: int):
+    current = await roles_cache.get(rol_id) if ObjectId.is_valid(rol_id) else None
+    if current is not None:
+        check_grant(rol_permissions(current), caller_permisos)
+
+async def update_rol(rol_id: str, rol: Rol, caller_permisos: int) -> Rol:
+    rol.nombre_rol = rol.nombre_rol.strip().lower()
+    check_grant(rol_permissions(rol), caller_permisos)
+    await _check_current_rol(rol_id, caller_permisos)
+    try:
+        doc = await coll.find_one_and_update(
             {"_id": ObjectId(rol_id)},
-            {"$set": rol.model_dump(exclude={"id"})}
+            {
+                "$set": {**rol.model_dump(exclude={"id", "version"}), "fecha_actualizacion": datetime.now()},
+                # Tokens carry the version they were issued with; a bump forces their renewal
+                "$inc": {"version": 1}
+            },
+            return_document=ReturnDocument.AFTER,
+            session=current_session()
         )
-        if result.modified_count == 0:
-            if coll.find_one({"_id": ObjectId(rol_id)}) is None:
-                raise HTTPException(status_code=404, detail="Rol not found")
-            return await get_rol_by_id(rol_id)
-        
-        return await get_rol_by_id(rol_id)
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Rol not found")
+        roles_cache.invalidate()
+        await bump_generation("roles")
+
+        doc['id'] = str(doc['_id'])
+        del doc['_id']
+        return Rol(**doc)
+    except HTTPException:
+        raise
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Rol with this name already exists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating rol: {str(e)}")
 
-async def delete_rol(rol_id: str):
+async def delete_rol(rol_id: str, caller_permisos: int):
+    await _check_current_rol(rol_id, caller_permisos)
     try:
-        result = coll.delete_one({"_id": ObjectId(rol_id)})
+        result = await coll.delete_one({"_id": ObjectId(rol_id)}, session=current_session())
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Rol not found")
+        roles_cache.invalidate()
+        await bump_generation("roles")
         return {"message": "Rol deleted successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting rol: {str(e)}")
\ No newline at end of file
@@ -1,83 +1,267 @@
+import os
 from models.tarea import Tarea
+from models.tarea_detalle import TareaDetalle
+from models.tarea_parcial import TareaParcial
+from models.resultado_masivo import ResultadoMasivo, ErrorMasivo
+from models.object_id import foreign_keys_to_object_id
 from utils.mongodb import get_collection
+from utils.read_routing import reader, current_session
+from utils.adapters import validate_many
+from utils.response_cache import bump_generation
+from pipelines.tarea_pipelines import get_tareas_pipeline, get_tarea_by_id_pipeline, get_tarea_version_pipeline
+from utils.streaming import cursor_items, EXPORT_BATCH_SIZE
+from utils.pagination import parse_sort, decode_cursor, keyset_filter
+from utils.fields import parse_fields, partial_model
+from controllers.estado_tarea import get_estado_tarea_id
 from fastapi import HTTPException
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 from bson import ObjectId
+from typing import AsyncIterator, Optional
 from datetime import datetime
 
 coll = get_collection("tareas")
 
+TAREA_FOREIGN_KEYS = ("id_proyecto", "estado_tarea", "categoria_tarea")
+TAREA_KEYSET_SORT = "-fecha_creacion"
+TAREA_BULK_MAX_SIZE = int(os.getenv("TAREA_BULK_MAX_SIZE", "500"))
+TAREA_SORT_FIELDS = {"id_proyecto", "actividad", "fecha_fin", "avance", "importancia", "dificultad", "estado_tarea", "categoria_tarea", "fecha_creacion", "fecha_actualizacion"}
+
+def _tarea_document(tarea: Tarea) -> dict:
+    tarea.actividad = tarea.actividad.strip()
+
+    tarea_dict = foreign_keys_to_object_id(tarea.model_dump(exclude={"id"}), TAREA_FOREIGN_KEYS)
+    tarea_dict["fecha_creacion"] = tarea.fecha_creacion
+    tarea_dict["fecha_actualizacion"] = tarea.fecha_actualizacion
+    if tarea.fecha_fin:
+        tarea_dict["fecha_fin"] = tarea.fecha_fin
+    return tarea_dict
+
+def _check_batch(items: list):
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(items) > TAREA_BULK_MAX_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch too large: {len(items)} items (max {TAREA_BULK_MAX_SIZE})")
+
+def _write_errors(e: BulkWriteError) -> list[dict]:
+    return e.details.get("writeErrors", [])
+
 async def create_tarea(tarea: Tarea) -> Tarea:
     try:
-        tarea.actividad = tarea.actividad.strip()
+        tarea_dict = _tarea_document(tarea)
 
-        tarea_dict = tarea.model_dump(exclude={"id"})
-        tarea_dict["fecha_creacion"] = tarea.fecha_creacion
-        tarea_dict["fecha_actualizacion"] = tarea.fecha_actualizacion
-        if tarea.fecha_fin:
-            tarea_dict["fecha_fin"] = tarea.fecha_fin
-        
-        inserted = coll.insert_one(tarea_dict)
+        inserted = await coll.insert_one(tarea_dict, session=current_session())
+        await bump_generation("tareas")
         tarea.id = str(inserted.inserted_id)
         return tarea
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating task: {str(e)}")
 
-async def get_tareas() -> list[Tarea]:
+async def get_tareas(skip: int = 0, limit: int = 50, sort: str = TAREA_KEYSET_SORT, after: Optional[str] = None, fields: Optional[str] = None) -> list[TareaDetalle]:
+    sort_spec = parse_sort(sort, TAREA_SORT_FIELDS)
+    selected = parse_fields(fields, TareaDetalle, [field for field, _ in sort_spec])
+    model = partial_model(TareaDetalle, selected) if selected else TareaDetalle
+    query = {}
+    if after:
+        if sort != TAREA_KEYSET_SORT:
+            raise HTTPException(status_code=400, detail=f"Cursor pagination only supports sort={TAREA_KEYSET_SORT}")
+        query = keyset_filter(sort_spec, decode_cursor(after, sort_spec))
+        skip = 0
     try:
-        tareas = []
-        for doc in coll.find():
-            doc['id'] = str(doc['_id'])
-            del doc['_id']
-            tareas.append(Tarea(**doc))
-        return tareas
+        cursor = await reader(coll).aggregate(get_tareas_pipeline(match=query, sort=sort_spec, skip=skip, limit=limit, fields=selected), session=current_session())
+        return validate_many(model, await cursor.to_list(None))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching tasks: {str(e)}")
 
-async def get_tarea_by_id(tarea_id: str) -> Tarea:
+async def export_tareas(sort: str = TAREA_KEYSET_SORT, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[TareaDetalle]:
+    sort_spec = parse_sort(sort, TAREA_SORT_FIELDS)
+    try:
+        cursor = await reader(coll).aggregate(
+            get_tareas_pipeline(sort=sort_spec),
+            batchSize=batch_size,
+            allowDiskUse=True,
+            session=current_session()
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error exporting tasks: {str(e)}")
+    return cursor_items(cursor, TareaDetalle)
+
+async def get_tarea_by_id(tarea_id: str) -> TareaDetalle:
     try:
-        doc = coll.find_one({"_id": ObjectId(tarea_id)})
-        if not doc:
+        cursor = await reader(coll).aggregate(get_tarea_by_id_pipeline(tarea_id), session=current_session())
+        docs = await cursor.to_list(1)
+        if not docs:
             raise HTTPException(status_code=404, detail="Tarea not found")
 
-        doc['id'] = str(doc['_id'])
-        del doc['_id']
-        return Tarea(**doc)
+        return TareaDetalle(**docs[0])
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching tarea: {str(e)}")
 
+async def get_tarea_version(tarea_id: str) -> Optional[list]:
+    if not ObjectId.is_valid(tarea_id):
+        return None
+    try:
+        cursor = await reader(coll).aggregate(get_tarea_version_pipeline(tarea_id), session=current_session())
+        docs = await cursor.to_list(1)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching tarea: {str(e)}")
+    return docs[0]["versiones"] if docs else None
+
 async def update_tarea(tarea_id: str, tarea: Tarea) -> Tarea:
     try:
         tarea.actividad = tarea.actividad.strip()
-        tarea_dict = tarea.model_dump(exclude={"id"})
+        tarea_dict = foreign_keys_to_object_id(tarea.model_dump(exclude={"id"}), TAREA_FOREIGN_KEYS)
         tarea_dict["fecha_actualizacion"] = datetime.now()
+        update = {"$set": tarea_dict}
         if tarea.fecha_fin is None:
-            coll.update_one({"_id": ObjectId(tarea_id)}, {"$unset": {"fecha_fin": ""}})
             del tarea_dict["fecha_fin"]
-        elif "fecha_fin" in tarea_dict and tarea_dict["fecha_fin"] is not None:
-             tarea_dict["fecha_fin"] = tarea.fecha_fin
+            update["$unset"] = {"fecha_fin": ""}
 
-        result = coll.update_one(
+        doc = await coll.find_one_and_update(
             {"_id": ObjectId(tarea_id)},
-            {"$set": tarea_dict}
+            update,
+            return_document=ReturnDocument.AFTER,
+            session=current_session()
         )
-        if result.modified_count == 0:
-            if coll.find_one({"_id": ObjectId(tarea_id)}) is None:
-                raise HTTPException(status_code=404, detail="Tarea not found")
-            return await get_tarea_by_id(tarea_id)
-        
-        return await get_tarea_by_id(tarea_id)
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Tarea not found")
+        await bump_generation("tareas")
+
+        doc['id'] = str(doc['_id'])
+        del doc['_id']
+        return Tarea(**doc)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating tarea: {str(e)}")
 
 async def deactivate_tarea(tarea_id: str) -> Tarea:
     try:
-        result = coll.update_one(
+        estado_id = await get_estado_tarea_id("desactivada")
+        doc = await coll.find_one_and_update(
             {"_id": ObjectId(tarea_id)},
-            {"$set": {"estado_tarea": "desactivada"}}
+            {"$set": {"estado_tarea": estado_id, "fecha_actualizacion": datetime.now()}},
+            return_document=ReturnDocument.AFTER,
+            session=current_session()
         )
-        if result.modified_count == 0:
+        if doc is None:
             raise HTTPException(status_code=404, detail="Tarea not found")
+        await bump_generation("tareas")
+
+        doc['id'] = str(doc['_id'])
+        del doc['_id']
+        return Tarea(**doc)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deactivating task: {str(e)}")
+
+async def create_tareas_bulk(tareas: list[Tarea]) -> ResultadoMasivo:
+    _check_batch(tareas)
+    result = ResultadoMasivo(recibidos=len(tareas), ids=[None] * len(tareas))
+    failed = {}
+    docs = []
+    positions = []
+    for index, tarea in enumerate(tareas):
+        try:
+            docs.append(_tarea_document(tarea))
+            positions.append(index)
+        except HTTPException as e:
+            failed[index] = e.detail
+
+    if docs:
+        try:
+            # Unordered: one bad document does not stop the rest of the batch
+            await coll.insert_many(docs, ordered=False, session=current_session())
+        except BulkWriteError as e:
+            failed.update({positions[error["index"]]: error["errmsg"] for error in _write_errors(e)})
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error creating tasks: {str(e)}")
+        await bump_generation("tareas")
+
+    for index, doc in zip(positions, docs):
+        if index not in failed:
+            result.ids[index] = str(doc["_id"])
+    result.errores = [ErrorMasivo(indice=index, mensaje=failed[index]) for index in sorted(failed)]
+    result.procesados = result.modificados = len(tareas) - len(failed)
+    return result
+
+async def update_tareas_bulk(cambios: list[TareaParcial]) -> ResultadoMasivo:
+    _check_batch(cambios)
+    result = ResultadoMasivo(recibidos=len(cambios), ids=[item.id for item in cambios])
+    try:
+        ids = [ObjectId(item.id) for item in cambios]
+        existing = {doc["_id"] async for doc in coll.find({"_id": {"$in": ids}}, {"_id": 1}, session=current_session())}
+
+        operations = []
+        positions = []
+        now = datetime.now()
+        for index, item in enumerate(cambios):
+            changes = item.model_dump(exclude_unset=True, exclude={"id"})
+            if ids[index] not in existing:
+                result.errores.append(ErrorMasivo(indice=index, id=item.id, mensaje="Tarea not found"))
+                continue
+            if not changes:
+                result.errores.append(ErrorMasivo(indice=index, id=item.id, mensaje="No fields to update"))
+                continue
+            if changes.get("actividad") is not None:
+                changes["actividad"] = changes["actividad"].strip()
+            update = {}
+            if "fecha_fin" in changes and changes["fecha_fin"] is None:
+                del changes["fecha_fin"]
+                update["$unset"] = {"fecha_fin": ""}
+            changes["fecha_actualizacion"] = now
+            update["$set"] = foreign_keys_to_object_id(changes, TAREA_FOREIGN_KEYS)
+            operations.append(UpdateOne({"_id": ids[index]}, update))
+            positions.append(index)
+
+        if operations:
+            try:
+                written = await coll.bulk_write(operations, ordered=False, session=current_session())
+                result.procesados, result.modificados = written.matched_count, written.modified_count
+            except BulkWriteError as e:
+                result.procesados = e.details.get("nMatched", 0)
+                result.modificados = e.details.get("nModified", 0)
+                for error in _write_errors(e):
+                    index = positions[error["index"]]
+                    result.errores.append(ErrorMasivo(indice=index, id=cambios[index].id, mensaje=error["errmsg"]))
+            await bump_generation("tareas")
+        result.errores.sort(key=lambda error: error.indice)
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating tasks: {str(e)}")
+
+async def deactivate_tareas_bulk(tarea_ids: list[str]) -> ResultadoMasivo:
+    _check_batch(tarea_ids)
+    result = ResultadoMasivo(recibidos=len(tarea_ids), ids=list(tarea_ids))
+    try:
+        ids = [ObjectId(tarea_id) if ObjectId.is_valid(tarea_id) else None for tarea_id in tarea_ids]
+        valid = [tarea_id for tarea_id in ids if tarea_id is not None]
+        existing = {doc["_id"] async for doc in coll.find({"_id": {"$in": valid}}, {"_id": 1}, session=current_session())}
+        for index, tarea_id in enumerate(ids):
+            if tarea_id is None:
+                result.errores.append(ErrorMasivo(indice=index, id=tarea_ids[index], mensaje="Invalid tarea id"))
+            elif tarea_id not in existing:
+                result.errores.append(ErrorMasivo(indice=index, id=tarea_ids[index], mensaje="Tarea not found"))
 
-        return await get_tarea_by_id(tarea_id)
+        if existing:
+            estado_id = await get_estado_tarea_id("desactivada")
+            # Same change for every task: a single update_many round trip
+            written = await coll.update_many(
+                {"_id": {"$in": list(existing)}},
+                {"$set": {"estado_tarea": estado_id, "fecha_actualizacion": datetime.now()}},
+                session=current_session()
+            )
+            result.procesados, result.modificados = written.matched_count, written.modified_count
+            await bump_generation("tareas")
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error deactivating task: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error deactivating tasks: {str(e)}")
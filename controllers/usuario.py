@@ -1,25 +1,50 @@
 import os
 import json
+import asyncio
 import logging
 from dotenv import load_dotenv
-import requests
+import httpx
 import base64
 import firebase_admin
 from firebase_admin import credentials, auth as firebase_auth
 from models.usuario import Usuario
 from models.usuario_salida import UsuarioSalida
+from models.usuario_detalle import UsuarioDetalle
+from models.object_id import foreign_keys_to_object_id
 from utils.mongodb import get_collection
+from utils.read_routing import reader, current_session
+from utils.adapters import validate_many
+from pipelines.usuario_pipelines import get_usuarios_with_rol_pipeline, get_usuario_by_id_with_rol_pipeline, get_usuario_version_pipeline
+from utils.streaming import cursor_items, EXPORT_BATCH_SIZE
+from utils.pagination import parse_sort, decode_cursor, keyset_filter
 from fastapi import HTTPException
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from bson import ObjectId
-from datetime import datetime
+from typing import AsyncIterator, Optional
+from datetime import datetime, timedelta, timezone
 from models.login import Login
+from models.login_firebase import LoginFirebase
+from models.refresh_token import RefreshToken
 from utils.security import create_jwt_token
+from utils.http_client import request_with_retry
+from utils.firebase_tokens import verify_firebase_token
+from utils.refresh_tokens import issue_refresh_token, rotate_refresh_token, revoke_refresh_token, ACCESS_TOKEN_MINUTES
+from utils.revocation import revocation_list
+from controllers.rol import get_rol_claims, check_rol_assignable
 coll = get_collection("usuarios")
 
+USUARIO_FOREIGN_KEYS = ("rol",)
+USUARIO_KEYSET_SORT = "-fecha_registro"
+USUARIO_SORT_FIELDS = {"email", "nombre", "rol", "fecha_registro"}
+
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Overridable to point logins at the Auth emulator or a local fake
+FIREBASE_AUTH_URL = os.getenv("FIREBASE_AUTH_URL", "https://identitytoolkit.googleapis.com/v1").rstrip("/")
+
 def initialize_firebase():
     if firebase_admin._apps:
         return
@@ -45,10 +70,12 @@ def initialize_firebase():
 
 initialize_firebase()
 
-async def create_usuario(usuario: Usuario) -> Usuario:
+async def create_usuario(usuario: Usuario, caller_permisos: int) -> Usuario:
+    await check_rol_assignable(usuario.rol, caller_permisos)
     registro_usuario = {}
     try:
-        registro_usuario = firebase_auth.create_user(
+        registro_usuario = await asyncio.to_thread(
+            firebase_auth.create_user,
             email = usuario.email,
             password = usuario.password
 
@@ -62,32 +89,61 @@ async def create_usuario(usuario: Usuario) -> Usuario:
     try:
         usuario.email = usuario.email.strip().lower()
 
-        existing_user = coll.find_one({"email": usuario.email})
-        if existing_user:
-            raise HTTPException(status_code=400, detail="User with this email already exists")
-        
-        usuario_dict = usuario.model_dump(exclude={"id","password"})
+        usuario_dict = foreign_keys_to_object_id(usuario.model_dump(exclude={"id","password"}), USUARIO_FOREIGN_KEYS)
+        usuario_dict["firebase_uid"] = registro_usuario.uid
         usuario_dict["fecha_registro"] = usuario.fecha_registro
+        usuario_dict["fecha_actualizacion"] = usuario.fecha_registro
         
-        inserted = coll.insert_one(usuario_dict)
+        inserted = await coll.insert_one(usuario_dict, session=current_session())
         usuario.id = str(inserted.inserted_id)
         return usuario
+    except HTTPException:
+        await asyncio.to_thread(firebase_auth.delete_user, registro_usuario.uid)
+
+        raise
+    except DuplicateKeyError:
+        await asyncio.to_thread(firebase_auth.delete_user, registro_usuario.uid)
+
+        raise HTTPException(status_code=400, detail="User with this email already exists")
     except Exception as e:
-        firebase_auth.delete_user(registro_usuario.uid)
+        await asyncio.to_thread(firebase_auth.delete_user, registro_usuario.uid)
 
         raise HTTPException(status_code=500, detail=f"Error creating user: {str(e)}")
     
+async def _session_for(user_info: dict, refresh_token: Optional[str] = None) -> dict:
+    # Short-lived access token plus the refresh token that renews it without a new login
+    if refresh_token is None:
+        refresh_token = await issue_refresh_token(str(user_info["_id"]))
+    return {
+        "message": "Usuario Autenticado correctamente"
+        , "idToken": create_jwt_token(
+            str(user_info["_id"]),
+            user_info["email"],
+            user_info["nombre"],
+            expires_delta=timedelta(minutes=ACCESS_TOKEN_MINUTES),
+            **await get_rol_claims(user_info.get("rol"))
+        )
+        , "refreshToken": refresh_token
+        , "expiresIn": ACCESS_TOKEN_MINUTES * 60
+    }
+
 async def login(user: Login) -> dict:
     api_key = os.getenv("FIREBASE_API_KEY")
-    url = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={api_key}"
+    url = f"{FIREBASE_AUTH_URL}/accounts:signInWithPassword"
     payload = {
         "email": user.email
         , "password": user.password
         , "returnSecureToken": True
     }
 
-    response = requests.post(url, json = payload)
-    response_data = response.json()
+    try:
+        response = await request_with_retry("POST", url, params={"key": api_key}, json=payload)
+        response_data = response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        raise HTTPException(
+            status_code=503
+            , detail=f"Authentication service unavailable: {str(e)}"
+        )
 
     if "error" in response_data:
         raise HTTPException(
@@ -96,73 +152,142 @@ async def login(user: Login) -> dict:
         )
     
     coll = get_collection("usuarios")
-    user_info = coll.find_one({ "email": user.email })
+    user_info = await reader(coll).find_one({ "email": user.email }, session=current_session())
 
     if not user_info:
         raise HTTPException(
             status_code=404
             , detail="Usuario no encontrado en la base de datos"
         )
-    return {
-        "message": "Usuario Autenticado correctamente"
-        , "idToken": create_jwt_token(
-            str(user_info["_id"]),
-            user_info["email"],
-            user_info["nombre"],
-            user_info["rol"]
+    return await _session_for(user_info)
+
+async def login_firebase(credentials: LoginFirebase) -> dict:
+    # Verified locally against the cached certificates: no call to Firebase here
+    claims = verify_firebase_token(credentials.id_token)
+
+    coll = get_collection("usuarios")
+    user_info = await reader(coll).find_one({ "firebase_uid": claims["sub"] }, session=current_session())
+    if not user_info and claims.get("email_verified") and claims.get("email"):
+        # Users created before firebase_uid was stored get linked on their first verified login
+        user_info = await coll.find_one_and_update(
+            { "email": claims["email"].strip().lower(), "firebase_uid": None },
+            { "$set": { "firebase_uid": claims["sub"] } },
+            return_document=ReturnDocument.AFTER,
+            session=current_session()
         )
-    }
+
+    if not user_info:
+        raise HTTPException(
+            status_code=404
+            , detail="Usuario no encontrado en la base de datos"
+        )
+    return await _session_for(user_info)
+
+async def refresh_session(credentials: RefreshToken) -> dict:
+    # No Firebase round trip: the stored refresh token is the proof of the earlier login
+    usuario_id, refresh_token = await rotate_refresh_token(credentials.refresh_token)
+
+    coll = get_collection("usuarios")
+    user_info = await coll.find_one({ "_id": ObjectId(usuario_id) }, {"email": 1, "nombre": 1, "rol": 1}, session=current_session())
+
+    if not user_info:
+        raise HTTPException(
+            status_code=401
+            , detail="Usuario no encontrado en la base de datos"
+        )
+    return await _session_for(user_info, refresh_token=refresh_token)
+
+async def logout(user: dict, credentials: Optional[RefreshToken] = None) -> dict:
+    try:
+        if user.get("jti"):
+            await revocation_list.revoke(user["jti"], datetime.fromtimestamp(user["exp"], timezone.utc), user["id"])
+        if credentials:
+            await revoke_refresh_token(credentials.refresh_token)
+        return {"message": "Sesión cerrada correctamente"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error logging out: {str(e)}")
 
 
-async def get_usuarios() -> list[UsuarioSalida]:
+async def get_usuarios(skip: int = 0, limit: int = 50, sort: str = USUARIO_KEYSET_SORT, after: Optional[str] = None) -> list[UsuarioDetalle]:
+    sort_spec = parse_sort(sort, USUARIO_SORT_FIELDS)
+    query = {}
+    if after:
+        if sort != USUARIO_KEYSET_SORT:
+            raise HTTPException(status_code=400, detail=f"Cursor pagination only supports sort={USUARIO_KEYSET_SORT}")
+        query = keyset_filter(sort_spec, decode_cursor(after, sort_spec))
+        skip = 0
     try:
-        usuarios = []
-        for doc in coll.find():
-            doc['id'] = str(doc['_id'])
-            del doc['_id']
-            usuarios.append(UsuarioSalida(**doc))
-        return usuarios
+        cursor = await reader(coll).aggregate(get_usuarios_with_rol_pipeline(match=query, sort=sort_spec, skip=skip, limit=limit), session=current_session())
+        return validate_many(UsuarioDetalle, await cursor.to_list(None))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching users: {str(e)}")
 
-async def get_usuario_by_id(usuario_id: str) -> UsuarioSalida:
+async def export_usuarios(sort: str = USUARIO_KEYSET_SORT, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[UsuarioDetalle]:
+    sort_spec = parse_sort(sort, USUARIO_SORT_FIELDS)
     try:
-        doc = coll.find_one({"_id": ObjectId(usuario_id)})
-        if not doc:
+        cursor = await reader(coll).aggregate(
+            get_usuarios_with_rol_pipeline(sort=sort_spec),
+            batchSize=batch_size,
+            allowDiskUse=True,
+            session=current_session()
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error exporting users: {str(e)}")
+    return cursor_items(cursor, UsuarioDetalle)
+
+async def get_usuario_by_id(usuario_id: str) -> UsuarioDetalle:
+    try:
+        cursor = await reader(coll).aggregate(get_usuario_by_id_with_rol_pipeline(usuario_id), session=current_session())
+        docs = await cursor.to_list(1)
+        if not docs:
             raise HTTPException(status_code=404, detail="User not found")
 
-        doc['id'] = str(doc['_id'])
-        del doc['_id']
-        return UsuarioSalida(**doc)
+        return UsuarioDetalle(**docs[0])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching user: {str(e)}")
+
+async def get_usuario_version(usuario_id: str) -> Optional[list]:
+    if not ObjectId.is_valid(usuario_id):
+        return None
+    try:
+        cursor = await reader(coll).aggregate(get_usuario_version_pipeline(usuario_id), session=current_session())
+        docs = await cursor.to_list(1)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching user: {str(e)}")
+    return docs[0]["versiones"] if docs else None
 
-async def update_usuario(usuario_id: str, usuario: Usuario) -> Usuario:
+async def update_usuario(usuario_id: str, usuario: Usuario, caller_permisos: int) -> UsuarioSalida:
+    await check_rol_assignable(usuario.rol, caller_permisos)
     try:
         usuario.email = usuario.email.strip().lower()
 
-        existing_user = coll.find_one({"email": usuario.email, "_id": {"$ne": ObjectId(usuario_id)}})
-        if existing_user:
-            raise HTTPException(status_code=400, detail="User with this email already exists")
+        usuario_dict = foreign_keys_to_object_id(usuario.model_dump(exclude={"id","password"}), USUARIO_FOREIGN_KEYS)
+        usuario_dict["fecha_actualizacion"] = datetime.now()
 
-        usuario_dict = usuario.model_dump(exclude={"id"})
-        
-        result = coll.update_one(
+        doc = await coll.find_one_and_update(
             {"_id": ObjectId(usuario_id)},
-            {"$set": usuario_dict}
+            {"$set": usuario_dict},
+            return_document=ReturnDocument.AFTER,
+            session=current_session()
         )
-        if result.modified_count == 0:
-            if coll.find_one({"_id": ObjectId(usuario_id)}) is None:
-                raise HTTPException(status_code=404, detail="User not found")
-            return await get_usuario_by_id(usuario_id)
-        
-        return await get_usuario_by_id(usuario_id)
+        if doc is None:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        doc['id'] = str(doc['_id'])
+        del doc['_id']
+        return UsuarioSalida(**doc)
+    except HTTPException:
+        raise
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="User with this email already exists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating user: {str(e)}")
 
 async def delete_usuario(usuario_id: str):
     try:
-        result = coll.delete_one({"_id": ObjectId(usuario_id)})
+        result = await coll.delete_one({"_id": ObjectId(usuario_id)}, session=current_session())
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="User not found")
         return {"message": "User deleted successfully"}
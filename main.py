@@ -1,8 +1,12 @@
 import uvicorn
+import logging
 
-from fastapi import FastAPI, Request, HTTPException
-from utils.security import validateadmin, validateuser
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request, HTTPException
+from typing import Optional
+from utils.security import AuthenticationMiddleware, require_user
 
+from routes.admin import router as admin_router
 from routes.categoria_tarea import router as categoria_tarea_router
 from routes.estado_proyecto import router as estado_proyecto_router
 from routes.estado_tarea import router as estado_tarea_router
@@ -12,15 +16,52 @@ from routes.tarea import router as tarea_router
 from routes.usuario import router as usuario_router 
 
 
-from controllers.usuario import create_usuario, login
+from controllers.usuario import create_usuario, login, login_firebase, refresh_session, logout
 from models.login import Login
+from models.login_firebase import LoginFirebase
+from models.refresh_token import RefreshToken
 from models.usuario import Usuario
+from utils.mongodb import close_mongo_client
+from utils.http_client import open_http_client, close_http_client
+from utils.firebase_tokens import certificates as firebase_certificates
+from utils.revocation import revocation_list
+from utils.indexes import ensure_indexes
+from utils.catalog_cache import warm_up_catalogs
+from utils.invalidation import watcher as invalidation_watcher
+from utils.read_routing import CausalConsistencyMiddleware
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await ensure_indexes()
+    except Exception as e:
+        logger.error(f"Index check failed at startup: {e}")
+    await warm_up_catalogs()
+    open_http_client()
+    firebase_certificates.start()
+    revocation_list.start()
+    invalidation_watcher.start()
+    yield
+    await invalidation_watcher.stop()
+    await firebase_certificates.stop()
+    await revocation_list.stop()
+    await close_http_client()
+    await close_mongo_client()
+
 app = FastAPI(
     title="Sistema de Gestión de Tareas (SGT) API",
     description="API para la gestión de proyectos, tareas, usuarios y roles.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Causal sessions run inside CORS so preflight requests never open one
+app.add_middleware(CausalConsistencyMiddleware)
+# Tokens are checked before any body is read; 401s still get CORS headers
+app.add_middleware(AuthenticationMiddleware)
+
 # Add CORS
 from fastapi.middleware.cors import CORSMiddleware
 app.add_middleware(
@@ -29,8 +70,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all methods
     allow_headers=["*"],  # Allow all headers
+    expose_headers=["X-Next-Cursor", "X-Operation-Time", "ETag", "X-Cache"],
 )
 
+app.include_router(admin_router)
 app.include_router(categoria_tarea_router)
 app.include_router(estado_proyecto_router)
 app.include_router(estado_tarea_router)
@@ -56,10 +99,10 @@ def health_check():
         return {"status": "unhealthy", "error": str(e)}
 
 @app.get("/ready")
-def readiness_check():
+async def readiness_check():
     try:
-        from utils.mongodb import test_connection
-        db_status = test_connection()
+        from utils.mongodb import t_connection
+        db_status = await t_connection()
         return {
             "status": "ready" if db_status else "not_ready",
             "database": "connected" if db_status else "disconnected",
@@ -72,5 +115,17 @@ def readiness_check():
 async def login_access(l : Login):
     return await login(l)
 
+@app.post("/login/firebase")
+async def login_firebase_access(credentials: LoginFirebase):
+    return await login_firebase(credentials)
+
+@app.post("/token/refresh")
+async def refresh_access(credentials: RefreshToken):
+    return await refresh_session(credentials)
+
+@app.post("/logout")
+async def logout_access(credentials: Optional[RefreshToken] = None, user: dict = Depends(require_user)):
+    return await logout(user, credentials)
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
\ No newline at end of file
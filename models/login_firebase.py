@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+
+class LoginFirebase(BaseModel):
+
+    id_token: str = Field(
+        min_length=1,
+        description="ID token emitido por Firebase Authentication en el cliente"
+    )
@@ -0,0 +1,35 @@
+from bson import ObjectId
+from fastapi import HTTPException
+from pydantic import AfterValidator, BeforeValidator
+from typing import Annotated, Iterable, Optional
+
+def _as_str(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if value is None:
+        return ""
+    return value
+
+def _check_object_id(value: str) -> str:
+    if value and not ObjectId.is_valid(value):
+        raise ValueError("Debe ser un ObjectId válido (24 caracteres hexadecimales)")
+    return value
+
+# Foreign key: rendered as a string in the API, stored as ObjectId (or null when empty).
+# Not checked here because these models also read unmigrated names back ("admin", "desactivada");
+# writes are checked in foreign_keys_to_object_id
+ObjectIdStr = Annotated[str, BeforeValidator(_as_str)]
+
+# For request-only models, where a bad id is rejected by validation itself
+ValidObjectIdStr = Annotated[str, BeforeValidator(_as_str), AfterValidator(_check_object_id)]
+
+def to_object_id(value: str) -> Optional[ObjectId]:
+    return ObjectId(value) if value else None
+
+def foreign_keys_to_object_id(data: dict, fields: Iterable[str]) -> dict:
+    for field in fields:
+        if field in data:
+            if data[field] and not ObjectId.is_valid(data[field]):
+                raise HTTPException(status_code=400, detail=f"Invalid {field}: must be a 24-character hex ObjectId")
+            data[field] = to_object_id(data[field])
+    return data
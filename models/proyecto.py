@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
+from models.object_id import ObjectIdStr
 
 class Proyecto(BaseModel):
     id: Optional[str] = Field(
@@ -23,7 +24,7 @@ class Proyecto(BaseModel):
         default_factory=datetime.now,
         description="Fecha y hora de la última actualización del proyecto"
     )
-    estado: str = Field(
+    estado: ObjectIdStr = Field(
         default="",
         description="Identificador del estado actual del proyecto (FK a la colección Estado_Proyecto)"
     )
\ No newline at end of file
@@ -0,0 +1,13 @@
+from pydantic import Field
+from typing import Optional
+from models.proyecto import Proyecto
+
+class ProyectoDetalle(Proyecto):
+    nombre_estado: Optional[str] = Field(
+        default=None,
+        description="Nombre del estado actual del proyecto"
+    )
+    descripcion_estado: Optional[str] = Field(
+        default=None,
+        description="Descripción del estado actual del proyecto"
+    )
@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+
+class RefreshToken(BaseModel):
+
+    refresh_token: str = Field(
+        min_length=1,
+        description="Refresh token devuelto por /login, /login/firebase o /token/refresh"
+    )
@@ -0,0 +1,36 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class ErrorMasivo(BaseModel):
+    indice: int = Field(
+        description="Posición del elemento en la lista enviada"
+    )
+    id: Optional[str] = Field(
+        default=None,
+        description="Identificador del documento afectado, si se conoce"
+    )
+    mensaje: str = Field(
+        description="Motivo del error"
+    )
+
+class ResultadoMasivo(BaseModel):
+    recibidos: int = Field(
+        default=0,
+        description="Número de elementos recibidos"
+    )
+    procesados: int = Field(
+        default=0,
+        description="Número de elementos insertados o encontrados para actualizar"
+    )
+    modificados: int = Field(
+        default=0,
+        description="Número de documentos realmente modificados"
+    )
+    ids: list[Optional[str]] = Field(
+        default_factory=list,
+        description="Identificadores en el orden enviado (null en los elementos con error)"
+    )
+    errores: list[ErrorMasivo] = Field(
+        default_factory=list,
+        description="Errores por elemento; el resto del lote se aplica igualmente"
+    )
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional
+from utils.permissions import PERMISOS
 
 class Rol(BaseModel):
     id: Optional[str] = Field(
@@ -9,4 +10,22 @@ class Rol(BaseModel):
     nombre_rol: str = Field(
         default="",
         description="Nombre descriptivo del rol (ej. 'admin', 'usuario')"
-    )
\ No newline at end of file
+    )
+    permisos: Optional[list[str]] = Field(
+        default=None,
+        description="Permisos otorgados por el rol; sin valor se usan los predeterminados según el nombre"
+    )
+    version: int = Field(
+        default=0,
+        description="Versión del rol, se incrementa en cada actualización (solo lectura)"
+    )
+
+    @field_validator('permisos')
+    @classmethod
+    def validate_permisos(cls, value: Optional[list[str]]):
+        if value is None:
+            return value
+        unknown = [p for p in value if p not in PERMISOS]
+        if unknown:
+            raise ValueError(f"Permisos desconocidos: {', '.join(unknown)}. Valores válidos: {', '.join(PERMISOS)}")
+        return list(dict.fromkeys(value))
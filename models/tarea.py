@@ -1,13 +1,14 @@
 from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
+from models.object_id import ObjectIdStr
 
 class Tarea(BaseModel):
     id: Optional[str] = Field(
         default=None,
         description="Identificador único de la tarea (ObjectId de MongoDB)"
     )
-    id_proyecto: str = Field(
+    id_proyecto: ObjectIdStr = Field(
         default="",
         description="Identificador del proyecto al que pertenece la tarea (FK a la colección Proyecto)"
     )
@@ -34,11 +35,11 @@ class Tarea(BaseModel):
         default="",
         description="Nivel de dificultad de la tarea (ej. 'Baja', 'Media', 'Alta')"
     )
-    estado_tarea: str = Field(
+    estado_tarea: ObjectIdStr = Field(
         default="",
         description="Identificador del estado actual de la tarea (FK a la colección Estado_Tarea)"
     )
-    categoria_tarea: str = Field(
+    categoria_tarea: ObjectIdStr = Field(
         default="",
         description="Identificador de la categoría a la que pertenece la tarea (FK a la colección Categoria_Tarea)"
     )
@@ -0,0 +1,17 @@
+from pydantic import Field
+from typing import Optional
+from models.tarea import Tarea
+
+class TareaDetalle(Tarea):
+    nombre_proyecto: Optional[str] = Field(
+        default=None,
+        description="Nombre del proyecto al que pertenece la tarea"
+    )
+    nombre_estado_tarea: Optional[str] = Field(
+        default=None,
+        description="Nombre del estado actual de la tarea"
+    )
+    nombre_categoria_tarea: Optional[str] = Field(
+        default=None,
+        description="Nombre de la categoría de la tarea"
+    )
@@ -0,0 +1,53 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional
+from datetime import datetime
+from models.object_id import ValidObjectIdStr
+
+class TareaParcial(BaseModel):
+    id: ValidObjectIdStr = Field(
+        min_length=1,
+        description="Identificador de la tarea a actualizar"
+    )
+    id_proyecto: Optional[ValidObjectIdStr] = Field(
+        default=None,
+        description="Identificador del proyecto al que pertenece la tarea"
+    )
+    actividad: Optional[str] = Field(
+        default=None,
+        description="Descripción de la actividad o tarea a realizar"
+    )
+    fecha_fin: Optional[datetime] = Field(
+        default=None,
+        description="Fecha límite; enviar null la elimina"
+    )
+    avance: Optional[float] = Field(
+        default=None,
+        ge=0.0,
+        le=100.0,
+        description="Porcentaje de avance de la tarea (0.0 a 100.0)"
+    )
+    importancia: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Nivel de importancia de la tarea"
+    )
+    dificultad: Optional[str] = Field(
+        default=None,
+        description="Nivel de dificultad de la tarea"
+    )
+    estado_tarea: Optional[ValidObjectIdStr] = Field(
+        default=None,
+        description="Identificador del estado actual de la tarea"
+    )
+    categoria_tarea: Optional[ValidObjectIdStr] = Field(
+        default=None,
+        description="Identificador de la categoría de la tarea"
+    )
+
+    @field_validator('id_proyecto', 'actividad', 'avance', 'importancia', 'dificultad', 'estado_tarea', 'categoria_tarea')
+    @classmethod
+    def reject_null(cls, value):
+        # Omitted fields are left untouched; only fecha_fin can be cleared with null
+        if value is None:
+            raise ValueError("No puede ser null; omitir el campo para no modificarlo.")
+        return value
@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+
+class TokenRevocado(BaseModel):
+
+    token: str = Field(
+        min_length=1,
+        description="Token de acceso a revocar antes de su expiración"
+    )
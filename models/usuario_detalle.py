@@ -0,0 +1,14 @@
+from pydantic import Field
+from typing import Optional
+from datetime import datetime
+from models.usuario_salida import UsuarioSalida
+
+class UsuarioDetalle(UsuarioSalida):
+    nombre_rol: Optional[str] = Field(
+        default=None,
+        description="Nombre del rol asignado al usuario"
+    )
+    fecha_actualizacion: Optional[datetime] = Field(
+        default=None,
+        description="Fecha y hora de la última actualización del usuario"
+    )
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, field_validator
 from typing import Optional
 from datetime import datetime
+from models.object_id import ObjectIdStr
 import re
 
 class UsuarioSalida(BaseModel):
@@ -18,7 +19,7 @@ class UsuarioSalida(BaseModel):
         description="Nombre completo del usuario",
         #pattern=r"^([A-Za-zÁÉÍÓÚÑáéíóúñ']+-| +)$"
     )
-    rol: str = Field(
+    rol: ObjectIdStr = Field(
         default="",
         description="Identificador del rol asignado al usuario (FK a la colección Rol)"
     )
@@ -1,40 +1,12 @@
 from bson import ObjectId
+from typing import Optional
+from utils.pagination import page_stages
+from utils.fields import lookup_stages, project_stage
 
-def get_proyectos_with_estado_pipeline() -> list:
-    return [
-        {
-            "$lookup": {
-                "from": "estados_proyecto",  
-                "localField": "estado",     
-                "foreignField": "_id",   
-                "as": "estado_info"      
-            }
-        },
-        {
-            "$unwind": { 
-                "path": "$estado_info",
-                "preserveNullAndEmptyArrays": True
-            }
-        },
-        {
-            "$project": {
-                "id": {"$toString": "$_id"},
-                "nombre_proyecto": 1,
-                "observaciones": 1,
-                "fecha_creacion": 1,
-                "fecha_actualizacion": 1,
-                "estado": {"$toString": "$estado"},
-                "nombre_estado": "$estado_info.nombre_estado",
-                "descripcion_estado": "$estado_info.descripcion",
-                "_id": 0
-            }
-        },
-        {"$sort": {"fecha_creacion": -1}}
-    ]
+DEFAULT_SORT = [("fecha_creacion", -1), ("_id", -1)]
 
-def get_proyecto_by_id_with_estado_pipeline(proyecto_id: str) -> list:
-    return [
-        {"$match": {"_id": ObjectId(proyecto_id)}},
+PROYECTO_LOOKUPS = [
+    (("nombre_estado", "descripcion_estado"), [
         {
             "$lookup": {
                 "from": "estados_proyecto",
@@ -49,19 +21,34 @@ def get_proyecto_by_id_with_estado_pipeline(proyecto_id: str) -> list:
                 "preserveNullAndEmptyArrays": True
             }
         },
-        {
-            "$project": {
-                "id": {"$toString": "$_id"},
-                "nombre_proyecto": 1,
-                "observaciones": 1,
-                "fecha_creacion": 1,
-                "fecha_actualizacion": 1,
-                "estado": {"$toString": "$estado"},
-                "nombre_estado": "$estado_info.nombre_estado",
-                "descripcion_estado": "$estado_info.descripcion",
-                "_id": 0
-            }
-        }
+    ]),
+]
+
+PROYECTO_PROJECTION = {
+    "id": {"$toString": "$_id"},
+    "nombre_proyecto": 1,
+    "observaciones": 1,
+    "fecha_creacion": 1,
+    "fecha_actualizacion": 1,
+    "estado": {"$toString": "$estado"},
+    "nombre_estado": "$estado_info.nombre_estado",
+    "descripcion_estado": "$estado_info.descripcion",
+    "_id": 0
+}
+
+def get_proyectos_with_estado_pipeline(match: Optional[dict] = None, sort: Optional[list] = None, skip: int = 0, limit: Optional[int] = None, fields: Optional[tuple] = None) -> list:
+    return page_stages(match, sort or DEFAULT_SORT, skip, limit) + lookup_stages(PROYECTO_LOOKUPS, fields) + [
+        project_stage(PROYECTO_PROJECTION, fields)
+    ]
+
+def get_proyecto_by_id_with_estado_pipeline(proyecto_id: str) -> list:
+    return [{"$match": {"_id": ObjectId(proyecto_id)}}] + lookup_stages(PROYECTO_LOOKUPS) + [
+        project_stage(PROYECTO_PROJECTION)
+    ]
+
+def get_proyecto_version_pipeline(proyecto_id: str) -> list:
+    return [{"$match": {"_id": ObjectId(proyecto_id)}}] + lookup_stages(PROYECTO_LOOKUPS) + [
+        {"$project": {"_id": 0, "versiones": ["$fecha_actualizacion", "$estado_info.fecha_actualizacion"]}}
     ]
 
 def validate_proyecto_exists_pipeline(proyecto_id: str) -> list:
@@ -1,59 +1,12 @@
 from bson import ObjectId
+from typing import Optional
+from utils.pagination import page_stages
+from utils.fields import lookup_stages, project_stage
 
-def get_tareas_pipeline() -> list:
-    return [
-        {
-            "$lookup": {
-                "from": "proyectos",        
-                "localField": "id_proyecto",
-                "foreignField": "_id",
-                "as": "proyecto_info"
-            }
-        },
-        {"$unwind": {"path": "$proyecto_info", "preserveNullAndEmptyArrays": True}},
-        {
-            "$lookup": {
-                "from": "estados_tarea",   
-                "localField": "estado_tarea",
-                "foreignField": "_id",
-                "as": "estado_tarea_info"
-            }
-        },
-        {"$unwind": {"path": "$estado_tarea_info", "preserveNullAndEmptyArrays": True}},
-        {
-            "$lookup": {
-                "from": "categorias_tarea", 
-                "localField": "categoria_tarea",
-                "foreignField": "_id",
-                "as": "categoria_tarea_info"
-            }
-        },
-        {"$unwind": {"path": "$categoria_tarea_info", "preserveNullAndEmptyArrays": True}},
-        {
-            "$project": {
-                "id": {"$toString": "$_id"},
-                "id_proyecto": {"$toString": "$id_proyecto"},
-                "nombre_proyecto": "$proyecto_info.nombre_proyecto",
-                "actividad": 1,
-                "fecha_fin": 1,
-                "avance": 1,
-                "importancia": 1,
-                "dificultad": 1,
-                "estado_tarea": {"$toString": "$estado_tarea"},
-                "nombre_estado_tarea": "$estado_tarea_info.nombre_estado",
-                "categoria_tarea": {"$toString": "$categoria_tarea"},
-                "nombre_categoria_tarea": "$categoria_tarea_info.nombre_categoria",
-                "fecha_creacion": 1,
-                "fecha_actualizacion": 1,
-                "_id": 0
-            }
-        },
-        {"$sort": {"fecha_creacion": -1}}
-    ]
+DEFAULT_SORT = [("fecha_creacion", -1), ("_id", -1)]
 
-def get_tarea_by_id_pipeline(tarea_id: str) -> list:
-    return [
-        {"$match": {"_id": ObjectId(tarea_id)}},
+TAREA_LOOKUPS = [
+    (("nombre_proyecto",), [
         {
             "$lookup": {
                 "from": "proyectos",
@@ -63,6 +16,8 @@ def get_tarea_by_id_pipeline(tarea_id: str) -> list:
             }
         },
         {"$unwind": {"path": "$proyecto_info", "preserveNullAndEmptyArrays": True}},
+    ]),
+    (("nombre_estado_tarea",), [
         {
             "$lookup": {
                 "from": "estados_tarea",
@@ -72,6 +27,8 @@ def get_tarea_by_id_pipeline(tarea_id: str) -> list:
             }
         },
         {"$unwind": {"path": "$estado_tarea_info", "preserveNullAndEmptyArrays": True}},
+    ]),
+    (("nombre_categoria_tarea",), [
         {
             "$lookup": {
                 "from": "categorias_tarea",
@@ -81,30 +38,50 @@ def get_tarea_by_id_pipeline(tarea_id: str) -> list:
             }
         },
         {"$unwind": {"path": "$categoria_tarea_info", "preserveNullAndEmptyArrays": True}},
-        {
-            "$project": {
-                "id": {"$toString": "$_id"},
-                "id_proyecto": {"$toString": "$id_proyecto"},
-                "nombre_proyecto": "$proyecto_info.nombre_proyecto",
-                "actividad": 1,
-                "fecha_fin": 1,
-                "avance": 1,
-                "importancia": 1,
-                "dificultad": 1,
-                "estado_tarea": {"$toString": "$estado_tarea"},
-                "nombre_estado_tarea": "$estado_tarea_info.nombre_estado",
-                "categoria_tarea": {"$toString": "$categoria_tarea"},
-                "nombre_categoria_tarea": "$categoria_tarea_info.nombre_categoria",
-                "fecha_creacion": 1,
-                "fecha_actualizacion": 1,
-                "_id": 0
-            }
-        }
+    ]),
+]
+
+TAREA_PROJECTION = {
+    "id": {"$toString": "$_id"},
+    "id_proyecto": {"$toString": "$id_proyecto"},
+    "nombre_proyecto": "$proyecto_info.nombre_proyecto",
+    "actividad": 1,
+    "fecha_fin": 1,
+    "avance": 1,
+    "importancia": 1,
+    "dificultad": 1,
+    "estado_tarea": {"$toString": "$estado_tarea"},
+    "nombre_estado_tarea": "$estado_tarea_info.nombre_estado",
+    "categoria_tarea": {"$toString": "$categoria_tarea"},
+    "nombre_categoria_tarea": "$categoria_tarea_info.nombre_categoria",
+    "fecha_creacion": 1,
+    "fecha_actualizacion": 1,
+    "_id": 0
+}
+
+def get_tareas_pipeline(match: Optional[dict] = None, sort: Optional[list] = None, skip: int = 0, limit: Optional[int] = None, fields: Optional[tuple] = None) -> list:
+    return page_stages(match, sort or DEFAULT_SORT, skip, limit) + lookup_stages(TAREA_LOOKUPS, fields) + [
+        project_stage(TAREA_PROJECTION, fields)
     ]
 
-def get_tareas_by_proyecto_pipeline(proyecto_id: str) -> list:
-    return [
-        {"$match": {"id_proyecto": ObjectId(proyecto_id)}},
+def get_tarea_by_id_pipeline(tarea_id: str) -> list:
+    return [{"$match": {"_id": ObjectId(tarea_id)}}] + lookup_stages(TAREA_LOOKUPS) + [
+        project_stage(TAREA_PROJECTION)
+    ]
+
+def get_tarea_version_pipeline(tarea_id: str) -> list:
+    # The body embeds joined names, so the version covers the joined documents too
+    return [{"$match": {"_id": ObjectId(tarea_id)}}] + lookup_stages(TAREA_LOOKUPS) + [
+        {"$project": {"_id": 0, "versiones": [
+            "$fecha_actualizacion",
+            "$proyecto_info.fecha_actualizacion",
+            "$estado_tarea_info.fecha_actualizacion",
+            "$categoria_tarea_info.fecha_actualizacion"
+        ]}}
+    ]
+
+def get_tareas_by_proyecto_pipeline(proyecto_id: str, sort: Optional[list] = None, skip: int = 0, limit: Optional[int] = None) -> list:
+    return page_stages({"id_proyecto": ObjectId(proyecto_id)}, sort or DEFAULT_SORT, skip, limit) + [
         {
             "$lookup": {
                 "from": "estados_tarea",
@@ -140,8 +117,7 @@ def get_tareas_by_proyecto_pipeline(proyecto_id: str) -> list:
                 "fecha_actualizacion": 1,
                 "_id": 0
             }
-        },
-        {"$sort": {"fecha_creacion": -1}}
+        }
     ]
 
 def validate_tarea_exists_pipeline(tarea_id: str) -> list:
@@ -1,7 +1,11 @@
 from bson import ObjectId
+from typing import Optional
+from utils.pagination import page_stages
 
-def get_usuarios_with_rol_pipeline() -> list:
-    return [
+DEFAULT_SORT = [("fecha_registro", -1), ("_id", -1)]
+
+def get_usuarios_with_rol_pipeline(match: Optional[dict] = None, sort: Optional[list] = None, skip: int = 0, limit: Optional[int] = None) -> list:
+    return page_stages(match, sort or DEFAULT_SORT, skip, limit) + [
         {
             "$lookup": {
                 "from": "roles",             
@@ -25,10 +29,10 @@ def get_usuarios_with_rol_pipeline() -> list:
                 "rol": {"$toString": "$rol"}, 
                 "nombre_rol": "$rol_info.nombre_rol", 
                 "fecha_registro": 1,
+                "fecha_actualizacion": 1,
                 "_id": 0
             }
-        },
-        {"$sort": {"fecha_registro": -1}}
+        }
     ]
 
 def get_usuario_by_id_with_rol_pipeline(usuario_id: str) -> list:
@@ -57,11 +61,26 @@ def get_usuario_by_id_with_rol_pipeline(usuario_id: str) -> list:
                 "rol": {"$toString": "$rol"},
                 "nombre_rol": "$rol_info.nombre_rol",
                 "fecha_registro": 1,
+                "fecha_actualizacion": 1,
                 "_id": 0
             }
         }
     ]
 
+def get_usuario_version_pipeline(usuario_id: str) -> list:
+    return [
+        {"$match": {"_id": ObjectId(usuario_id)}},
+        {"$lookup": {"from": "roles", "localField": "rol", "foreignField": "_id", "as": "rol_info"}},
+        {"$unwind": {"path": "$rol_info", "preserveNullAndEmptyArrays": True}},
+        {
+            "$project": {
+                "_id": 0,
+                # users never updated since the field was introduced only have fecha_registro
+                "versiones": [{"$ifNull": ["$fecha_actualizacion", "$fecha_registro"]}, "$rol_info.fecha_actualizacion"]
+            }
+        }
+    ]
+
 def validate_usuario_exists_pipeline(usuario_id: str) -> list:
     return [
         {"$match": {"_id": ObjectId(usuario_id)}},
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, Request
+from models.token_revocado import TokenRevocado
+from utils.catalog_cache import catalog_stats
+from utils.invalidation import watcher as invalidation_watcher
+from utils.response_cache import response_cache_stats
+from utils.indexes import check_indexes, index_stats
+from utils.json_response import MongoJSONResponse
+from utils.mongodb import pool_stats
+from utils.security import require_admin, revoke_access_token
+from utils.revocation import revocation_list
+from utils.token_cache import token_cache
+from utils.firebase_tokens import certificates as firebase_certificates
+
+router = APIRouter(prefix="/admin", tags=["⚙️ Administración"], dependencies=[Depends(require_admin)])
+
+@router.get("/indexes", summary="Estado y uso de los índices")
+async def get_indexes(
+    request: Request
+):
+    # Raw $indexStats documents: encoded as they come, without jsonable_encoder
+    return MongoJSONResponse({
+        "check": await check_indexes(),
+        "stats": await index_stats()
+    })
+
+@router.get("/pool", summary="Estadísticas del pool de conexiones a MongoDB")
+async def get_pool(
+    request: Request
+):
+    return pool_stats()
+
+@router.get("/cache", summary="Estadísticas de la caché de catálogos")
+async def get_cache(
+    request: Request
+):
+    return {
+        "catalogs": catalog_stats(),
+        "responses": response_cache_stats(),
+        "tokens": token_cache.stats(),
+        "firebase_certificates": firebase_certificates.stats(),
+        "revocation": revocation_list.stats(),
+        "invalidation": invalidation_watcher.stats()
+    }
+
+@router.post("/tokens/revoke", summary="Revocar un token de acceso antes de su expiración")
+async def revoke_token(
+    request: Request,
+    data: TokenRevocado
+):
+    return await revoke_access_token(data.token)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Query, HTTPException, Request
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
 from models.categoria_tarea import CategoriaTarea
 from controllers.categoria_tarea import (
     create_categoria_tarea,
@@ -7,12 +7,11 @@ from controllers.categoria_tarea import (
     update_categoria_tarea,
     delete_categoria_tarea
 )
-from utils.security import validateadmin
+from utils.security import require_permission
 
-router = APIRouter(prefix="/categorias-tarea", tags=["🗂️ Categorias de Tarea"])
+router = APIRouter(prefix="/categorias-tarea", tags=["🗂️ Categorias de Tarea"], dependencies=[Depends(require_permission("catalogos:gestionar"))])
 
 @router.post("/", summary="Crear nueva categoría de tarea", response_model=CategoriaTarea)
-@validateadmin
 async def create_new_categoria_tarea(
     request: Request,
     categoria_tarea_data: CategoriaTarea
@@ -21,17 +20,16 @@ async def create_new_categoria_tarea(
     return result
 
 @router.get("/", summary="Obtener todas las categorías de tarea", response_model=list[CategoriaTarea])
-@validateadmin
 async def get_all_categorias_tarea(
     request: Request,
     skip: int = Query(default=0, ge=0, description="Número de registros a omitir"),
-    limit: int = Query(default=50, ge=1, le=100, description="Número de registros a obtener")
+    limit: int = Query(default=50, ge=1, le=100, description="Número de registros a obtener"),
+    sort: str = Query(default="nombre_categoria", description="Campos de ordenamiento separados por coma; prefijo '-' para orden descendente")
 ):
-    result = await get_categorias_tarea()
-    return result[skip : skip + limit]
+    result = await get_categorias_tarea(skip=skip, limit=limit, sort=sort)
+    return result
 
 @router.get("/{categoria_tarea_id}", summary="Obtener categoría de tarea por ID", response_model=CategoriaTarea)
-@validateadmin
 async def get_single_categoria_tarea(
     request: Request,
     categoria_tarea_id: str
@@ -40,7 +38,6 @@ async def get_single_categoria_tarea(
     return result
 
 @router.put("/{categoria_tarea_id}", summary="Actualizar categoría de tarea", response_model=CategoriaTarea)
-@validateadmin
 async def update_single_categoria_tarea(
     request: Request,
     categoria_tarea_id: str,
@@ -50,7 +47,6 @@ async def update_single_categoria_tarea(
     return result
 
 @router.delete("/{categoria_tarea_id}", summary="Eliminar categoría de tarea")
-@validateadmin
 async def delete_single_categoria_tarea(
     request: Request,
     categoria_tarea_id: str
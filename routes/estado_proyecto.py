@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Query, HTTPException, Request
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
 from models.estado_proyecto import EstadoProyecto
 from controllers.estado_proyecto import (
     create_estado_proyecto,
@@ -7,12 +7,11 @@ from controllers.estado_proyecto import (
     update_estado_proyecto,
     delete_estado_proyecto
 )
-from utils.security import validateadmin
+from utils.security import require_permission
 
-router = APIRouter(prefix="/estados-proyecto", tags=["📊 Estados de Proyecto"])
+router = APIRouter(prefix="/estados-proyecto", tags=["📊 Estados de Proyecto"], dependencies=[Depends(require_permission("catalogos:gestionar"))])
 
 @router.post("/", summary="Crear nuevo estado de proyecto", response_model=EstadoProyecto)
-@validateadmin
 async def create_new_estado_proyecto(
     request: Request,
     estado_proyecto_data: EstadoProyecto
@@ -21,17 +20,16 @@ async def create_new_estado_proyecto(
     return result
 
 @router.get("/", summary="Obtener todos los estados de proyecto", response_model=list[EstadoProyecto])
-@validateadmin
 async def get_all_estados_proyecto(
     request: Request,
     skip: int = Query(default=0, ge=0, description="Número de registros a omitir"),
-    limit: int = Query(default=50, ge=1, le=100, description="Número de registros a obtener")
+    limit: int = Query(default=50, ge=1, le=100, description="Número de registros a obtener"),
+    sort: str = Query(default="nombre_estado", description="Campos de ordenamiento separados por coma; prefijo '-' para orden descendente")
 ):
-    result = await get_estados_proyecto()
-    return result[skip : skip + limit]
+    result = await get_estados_proyecto(skip=skip, limit=limit, sort=sort)
+    return result
 
 @router.get("/{estado_proyecto_id}", summary="Obtener estado de proyecto por ID", response_model=EstadoProyecto)
-@validateadmin
 async def get_single_estado_proyecto(
     request: Request,
     estado_proyecto_id: str
@@ -40,7 +38,6 @@ async def get_single_estado_proyecto(
     return result
 
 @router.put("/{estado_proyecto_id}", summary="Actualizar estado de proyecto", response_model=EstadoProyecto)
-@validateadmin
 async def update_single_estado_proyecto(
     request: Request,
     estado_proyecto_id: str,
@@ -50,7 +47,6 @@ async def update_single_estado_proyecto(
     return result
 
 @router.delete("/{estado_proyecto_id}", summary="Eliminar estado de proyecto")
-@validateadmin
 async def delete_single_estado_proyecto(
     request: Request,
     estado_proyecto_id: str
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Query, HTTPException, Request
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
 from models.estado_tarea import EstadoTarea
 from controllers.estado_tarea import (
     create_estado_tarea,
@@ -7,12 +7,11 @@ from controllers.estado_tarea import (
     update_estado_tarea,
     delete_estado_tarea
 )
-from utils.security import validateadmin
+from utils.security import require_permission
 
-router = APIRouter(prefix="/estados-tarea", tags=["📝 Estados de Tarea"])
+router = APIRouter(prefix="/estados-tarea", tags=["📝 Estados de Tarea"], dependencies=[Depends(require_permission("catalogos:gestionar"))])
 
 @router.post("/", summary="Crear nuevo estado de tarea", response_model=EstadoTarea)
-@validateadmin
 async def create_new_estado_tarea(
     request: Request,
     estado_tarea_data: EstadoTarea
@@ -21,17 +20,16 @@ async def create_new_estado_tarea(
     return result
 
 @router.get("/", summary="Obtener todos los estados de tarea", response_model=list[EstadoTarea])
-@validateadmin
 async def get_all_estados_tarea(
     request: Request,
     skip: int = Query(default=0, ge=0, description="Número de registros a omitir"),
-    limit: int = Query(default=50, ge=1, le=100, description="Número de registros a obtener")
+    limit: int = Query(default=50, ge=1, le=100, description="Número de registros a obtener"),
+    sort: str = Query(default="nombre_estado", description="Campos de ordenamiento separados por coma; prefijo '-' para orden descendente")
 ):
-    result = await get_estados_tarea()
-    return result[skip : skip + limit]
+    result = await get_estados_tarea(skip=skip, limit=limit, sort=sort)
+    return result
 
 @router.get("/{estado_tarea_id}", summary="Obtener estado de tarea por ID", response_model=EstadoTarea)
-@validateadmin
 async def get_single_estado_tarea(
     request: Request,
     estado_tarea_id: str
@@ -40,7 +38,6 @@ async def get_single_estado_tarea(
     return result
 
 @router.put("/{estado_tarea_id}", summary="Actualizar estado de tarea", response_model=EstadoTarea)
-@validateadmin
 async def update_single_estado_tarea(
     request: Request,
     estado_tarea_id: str,
@@ -50,7 +47,6 @@ async def update_single_estado_tarea(
     return result
 
 @router.delete("/{estado_tarea_id}", summary="Eliminar estado de tarea")
-@validateadmin
 async def delete_single_estado_tarea(
     request: Request,
     estado_tarea_id: str
@@ -1,18 +1,24 @@
-from fastapi import APIRouter, Query, HTTPException, Request
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from typing import Optional
 from models.proyecto import Proyecto
+from models.proyecto_detalle import ProyectoDetalle
 from controllers.proyecto import (
     create_proyecto,
     get_proyectos,
     get_proyecto_by_id,
+    get_proyecto_version,
     update_proyecto,
     deactivate_proyecto
 )
-from utils.security import validateuser, validateadmin
+from utils.fields import fields_response
+from utils.etag import if_none_match, set_etag
+from utils.read_routing import secondary_reads
+from utils.response_cache import cache_response
+from utils.security import require_permission
 
-router = APIRouter(prefix="/proyectos", tags=["🚧 Proyectos"])
+router = APIRouter(prefix="/proyectos", tags=["🚧 Proyectos"], dependencies=[Depends(require_permission("proyectos:leer"))])
 
-@router.post("/", summary="Crear nuevo proyecto", response_model=Proyecto)
-@validateuser
+@router.post("/", summary="Crear nuevo proyecto", response_model=Proyecto, dependencies=[Depends(require_permission("proyectos:escribir"))])
 async def create_new_proyecto(
     request: Request,
     proyecto_data: Proyecto
@@ -20,29 +26,37 @@ async def create_new_proyecto(
     result = await create_proyecto(proyecto_data)
     return result
 
-@router.get("/", summary="Obtener proyectos", response_model=list[Proyecto])
-@validateuser
+@router.get("/", summary="Obtener proyectos", response_model=list[ProyectoDetalle], dependencies=[Depends(secondary_reads)])
+@cache_response("proyectos", depends=("proyectos", "estados_proyecto"), ttl=60)
 async def get_all_proyectos(
     request: Request,
     skip: int = Query(default=0, ge=0, description="Número de registros a omitir"),
-    limit: int = Query(default=50, ge=1, le=100, description="Número de registros a obtener")
+    limit: int = Query(default=50, ge=1, le=100, description="Número de registros a obtener"),
+    sort: str = Query(default="-fecha_creacion", description="Campos de ordenamiento separados por coma; prefijo '-' para orden descendente"),
+    fields: Optional[str] = Query(default=None, description="Campos a devolver separados por coma; el id y los campos de ordenamiento siempre se incluyen")
 ):
     is_admin = getattr(request.state, 'admin', False)
-    result = await get_proyectos()
-    return result[skip : skip + limit]
+    result = await get_proyectos(skip=skip, limit=limit, sort=sort, fields=fields)
+    if fields:
+        return fields_response(result)
+    return result
 
-@router.get("/{proyecto_id}", summary="Obtener proyecto por ID", response_model=Proyecto)
-@validateuser
+@router.get("/{proyecto_id}", summary="Obtener proyecto por ID", response_model=ProyectoDetalle, dependencies=[Depends(secondary_reads)])
 async def get_single_proyecto(
     request: Request,
+    response: Response,
     proyecto_id: str
 ):
     is_admin = getattr(request.state, 'admin', False)
+    version = await get_proyecto_version(proyecto_id)
+    not_modified = if_none_match(request, version)
+    if not_modified:
+        return not_modified
     result = await get_proyecto_by_id(proyecto_id)
+    set_etag(response, version)
     return result
 
-@router.put("/{proyecto_id}", summary="Actualizar proyecto", response_model=Proyecto)
-@validateuser
+@router.put("/{proyecto_id}", summary="Actualizar proyecto", response_model=Proyecto, dependencies=[Depends(require_permission("proyectos:escribir"))])
 async def update_single_proyecto(
     request: Request,
     proyecto_id: str,
@@ -52,8 +66,7 @@ async def update_single_proyecto(
     result = await update_proyecto(proyecto_id, proyecto_data)
     return result
 
-@router.put("/{proyecto_id}/deactivate", summary="Desactivar proyecto", response_model=Proyecto)
-@validateadmin
+@router.put("/{proyecto_id}/deactivate", summary="Desactivar proyecto", response_model=Proyecto, dependencies=[Depends(require_permission("proyectos:desactivar"))])
 async def deactivate_single_proyecto(
     request: Request,
     proyecto_id: str
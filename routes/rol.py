@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Query, HTTPException, Request
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
 from models.rol import Rol
 from controllers.rol import (
     create_rol,
@@ -7,31 +7,29 @@ from controllers.rol import (
     update_rol,
     delete_rol
 )
-from utils.security import validateadmin
+from utils.security import require_permission
 
-router = APIRouter(prefix="/roles", tags=["👤 Roles"])
+router = APIRouter(prefix="/roles", tags=["👤 Roles"], dependencies=[Depends(require_permission("catalogos:gestionar"))])
 
 @router.post("/", summary="Crear nuevo rol", response_model=Rol)
-@validateadmin
 async def create_new_rol(
     request: Request,
     rol_data: Rol
 ):
-    result = await create_rol(rol_data)
+    result = await create_rol(rol_data, request.state.permisos)
     return result
 
 @router.get("/", summary="Obtener todos los roles", response_model=list[Rol])
-@validateadmin
 async def get_all_roles(
     request: Request,
     skip: int = Query(default=0, ge=0, description="Número de registros a omitir"),
-    limit: int = Query(default=50, ge=1, le=100, description="Número de registros a obtener")
+    limit: int = Query(default=50, ge=1, le=100, description="Número de registros a obtener"),
+    sort: str = Query(default="nombre_rol", description="Campos de ordenamiento separados por coma; prefijo '-' para orden descendente")
 ):
-    result = await get_roles()
-    return result[skip : skip + limit]
+    result = await get_roles(skip=skip, limit=limit, sort=sort)
+    return result
 
 @router.get("/{rol_id}", summary="Obtener rol por ID", response_model=Rol)
-@validateadmin
 async def get_single_rol(
     request: Request,
     rol_id: str
@@ -40,20 +38,18 @@ async def get_single_rol(
     return result
 
 @router.put("/{rol_id}", summary="Actualizar rol", response_model=Rol)
-@validateadmin
 async def update_single_rol(
     request: Request,
     rol_id: str,
     rol_data: Rol
 ):
-    result = await update_rol(rol_id, rol_data)
+    result = await update_rol(rol_id, rol_data, request.state.permisos)
     return result
 
 @router.delete("/{rol_id}", summary="Eliminar rol")
-@validateadmin
 async def delete_single_rol(
     request: Request,
     rol_id: str
 ):
-    result = await delete_rol(rol_id)
+    result = await delete_rol(rol_id, request.state.permisos)
     return result
\ No newline at end of file
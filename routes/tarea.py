@@ -1,18 +1,34 @@
-from fastapi import APIRouter, Query, HTTPException, Request
+from fastapi import APIRouter, Body, Depends, Query, HTTPException, Request, Response
+from typing import Optional
 from models.tarea import Tarea
+from models.tarea_detalle import TareaDetalle
+from models.tarea_parcial import TareaParcial
+from models.resultado_masivo import ResultadoMasivo
 from controllers.tarea import (
     create_tarea,
     get_tareas,
+    export_tareas,
     get_tarea_by_id,
+    get_tarea_version,
     update_tarea,
-    deactivate_tarea
+    deactivate_tarea,
+    create_tareas_bulk,
+    update_tareas_bulk,
+    deactivate_tareas_bulk,
+    TAREA_KEYSET_SORT,
+    TAREA_SORT_FIELDS
 )
-from utils.security import validateuser, validateadmin
+from utils.pagination import parse_sort, next_cursor
+from utils.fields import fields_response
+from utils.etag import if_none_match, set_etag
+from utils.read_routing import secondary_reads
+from utils.response_cache import cache_response
+from utils.streaming import streaming_response
+from utils.security import require_admin, require_permission
 
-router = APIRouter(prefix="/tareas", tags=["✅ Tareas"])
+router = APIRouter(prefix="/tareas", tags=["✅ Tareas"], dependencies=[Depends(require_permission("tareas:leer"))])
 
-@router.post("/", summary="Crear nueva tarea", response_model=Tarea)
-@validateuser
+@router.post("/", summary="Crear nueva tarea", response_model=Tarea, dependencies=[Depends(require_permission("tareas:escribir"))])
 async def create_new_tarea(
     request: Request,
     tarea_data: Tarea
@@ -20,29 +36,76 @@ async def create_new_tarea(
     result = await create_tarea(tarea_data)
     return result
 
-@router.get("/", summary="Obtener tareas", response_model=list[Tarea])
-@validateuser
+@router.post("/bulk", summary="Crear tareas en lote", response_model=ResultadoMasivo, dependencies=[Depends(require_permission("tareas:escribir"))])
+async def create_tareas_in_bulk(
+    request: Request,
+    tareas_data: list[Tarea]
+):
+    result = await create_tareas_bulk(tareas_data)
+    return result
+
+@router.patch("/bulk", summary="Actualizar tareas en lote", response_model=ResultadoMasivo, dependencies=[Depends(require_permission("tareas:escribir"))])
+async def update_tareas_in_bulk(
+    request: Request,
+    cambios: list[TareaParcial]
+):
+    result = await update_tareas_bulk(cambios)
+    return result
+
+@router.put("/bulk/deactivate", summary="Desactivar tareas en lote", response_model=ResultadoMasivo, dependencies=[Depends(require_permission("tareas:desactivar"))])
+async def deactivate_tareas_in_bulk(
+    request: Request,
+    tarea_ids: list[str] = Body(description="Identificadores de las tareas a desactivar")
+):
+    result = await deactivate_tareas_bulk(tarea_ids)
+    return result
+
+@router.get("/", summary="Obtener tareas", response_model=list[TareaDetalle], dependencies=[Depends(secondary_reads)])
+@cache_response("tareas", depends=("tareas", "proyectos", "estados_tarea", "categorias_tarea"))
 async def get_all_tareas(
     request: Request,
+    response: Response,
     skip: int = Query(default=0, ge=0, description="Número de registros a omitir"),
-    limit: int = Query(default=50, ge=1, le=100, description="Número de registros a obtener")
+    limit: int = Query(default=50, ge=1, le=100, description="Número de registros a obtener"),
+    sort: str = Query(default="-fecha_creacion", description="Campos de ordenamiento separados por coma; prefijo '-' para orden descendente"),
+    after: Optional[str] = Query(default=None, description="Cursor opaco devuelto en la cabecera X-Next-Cursor de la página anterior"),
+    fields: Optional[str] = Query(default=None, description="Campos a devolver separados por coma; el id y los campos de ordenamiento siempre se incluyen")
 ):
     is_admin = getattr(request.state, 'admin', False)
-    result = await get_tareas()
-    return result[skip : skip + limit]
+    result = await get_tareas(skip=skip, limit=limit, sort=sort, after=after, fields=fields)
+    if sort == TAREA_KEYSET_SORT:
+        cursor = next_cursor(result, limit, parse_sort(sort, TAREA_SORT_FIELDS))
+        if cursor:
+            response.headers["X-Next-Cursor"] = cursor
+    if fields:
+        return fields_response(result, headers=dict(response.headers))
+    return result
+
+@router.get("/export", summary="Exportar todas las tareas", dependencies=[Depends(require_admin), Depends(secondary_reads)])
+async def export_all_tareas(
+    request: Request,
+    format: str = Query(default="ndjson", pattern="^(ndjson|json)$", description="ndjson: un documento por línea; json: un único arreglo"),
+    sort: str = Query(default=TAREA_KEYSET_SORT, description="Campos de ordenamiento separados por coma; prefijo '-' para orden descendente")
+):
+    items = await export_tareas(sort=sort)
+    return streaming_response(items, format)
 
-@router.get("/{tarea_id}", summary="Obtener tarea por ID", response_model=Tarea)
-@validateuser
+@router.get("/{tarea_id}", summary="Obtener tarea por ID", response_model=TareaDetalle, dependencies=[Depends(secondary_reads)])
 async def get_single_tarea(
     request: Request,
+    response: Response,
     tarea_id: str
 ):
     is_admin = getattr(request.state, 'admin', False)
+    version = await get_tarea_version(tarea_id)
+    not_modified = if_none_match(request, version)
+    if not_modified:
+        return not_modified
     result = await get_tarea_by_id(tarea_id)
+    set_etag(response, version)
     return result
 
-@router.put("/{tarea_id}", summary="Actualizar tarea", response_model=Tarea)
-@validateuser
+@router.put("/{tarea_id}", summary="Actualizar tarea", response_model=Tarea, dependencies=[Depends(require_permission("tareas:escribir"))])
 async def update_single_tarea(
     request: Request,
     tarea_id: str,
@@ -52,8 +115,7 @@ async def update_single_tarea(
     result = await update_tarea(tarea_id, tarea_data)
     return result
 
-@router.put("/{tarea_id}/deactivate", summary="Desactivar tarea", response_model=Tarea)
-@validateadmin
+@router.put("/{tarea_id}/deactivate", summary="Desactivar tarea", response_model=Tarea, dependencies=[Depends(require_permission("tareas:desactivar"))])
 async def deactivate_single_tarea(
     request: Request,
     tarea_id: str
@@ -1,40 +1,64 @@
-from fastapi import APIRouter, Query, HTTPException, Request
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from typing import Optional
 from models.usuario import Usuario
 from models.usuario_salida import UsuarioSalida
+from models.usuario_detalle import UsuarioDetalle
 from controllers.usuario import (
     create_usuario,
     get_usuarios,
+    export_usuarios,
     get_usuario_by_id,
+    get_usuario_version,
     update_usuario,
-    delete_usuario
+    delete_usuario,
+    USUARIO_KEYSET_SORT,
+    USUARIO_SORT_FIELDS
 )
-from utils.security import validateuser, validateadmin
+from utils.pagination import parse_sort, next_cursor
+from utils.etag import if_none_match, set_etag
+from utils.read_routing import secondary_reads
+from utils.streaming import streaming_response
+from utils.security import require_user, require_permission
 
-router = APIRouter(prefix="/usuarios", tags=["👤 Usuarios"])
+router = APIRouter(prefix="/usuarios", tags=["👤 Usuarios"], dependencies=[Depends(require_user)])
 
-@router.post("/", summary="Crear nuevo usuario", response_model=Usuario)
-@validateadmin
+@router.post("/", summary="Crear nuevo usuario", response_model=Usuario, dependencies=[Depends(require_permission("usuarios:gestionar"))])
 async def create_new_usuario(
     request: Request,
     usuario_data: Usuario
 ):
-    result = await create_usuario(usuario_data)
+    result = await create_usuario(usuario_data, request.state.permisos)
     return result
 
-@router.get("/", summary="Obtener usuarios", response_model=list[UsuarioSalida])
-@validateadmin
+@router.get("/", summary="Obtener usuarios", response_model=list[UsuarioDetalle], dependencies=[Depends(require_permission("usuarios:gestionar")), Depends(secondary_reads)])
 async def get_all_usuarios(
     request: Request,
+    response: Response,
     skip: int = Query(default=0, ge=0, description="Número de registros a omitir"),
-    limit: int = Query(default=50, ge=1, le=100, description="Número de registros a obtener")
+    limit: int = Query(default=50, ge=1, le=100, description="Número de registros a obtener"),
+    sort: str = Query(default="-fecha_registro", description="Campos de ordenamiento separados por coma; prefijo '-' para orden descendente"),
+    after: Optional[str] = Query(default=None, description="Cursor opaco devuelto en la cabecera X-Next-Cursor de la página anterior")
 ):
-    result = await get_usuarios()
-    return result[skip : skip + limit]
+    result = await get_usuarios(skip=skip, limit=limit, sort=sort, after=after)
+    if sort == USUARIO_KEYSET_SORT:
+        cursor = next_cursor(result, limit, parse_sort(sort, USUARIO_SORT_FIELDS))
+        if cursor:
+            response.headers["X-Next-Cursor"] = cursor
+    return result
 
-@router.get("/{usuario_id}", summary="Obtener usuario por ID", response_model=UsuarioSalida)
-@validateuser
+@router.get("/export", summary="Exportar todos los usuarios", dependencies=[Depends(require_permission("usuarios:gestionar")), Depends(secondary_reads)])
+async def export_all_usuarios(
+    request: Request,
+    format: str = Query(default="ndjson", pattern="^(ndjson|json)$", description="ndjson: un documento por línea; json: un único arreglo"),
+    sort: str = Query(default=USUARIO_KEYSET_SORT, description="Campos de ordenamiento separados por coma; prefijo '-' para orden descendente")
+):
+    items = await export_usuarios(sort=sort)
+    return streaming_response(items, format)
+
+@router.get("/{usuario_id}", summary="Obtener usuario por ID", response_model=UsuarioDetalle, dependencies=[Depends(secondary_reads)])
 async def get_single_usuario(
     request: Request,
+    response: Response,
     usuario_id: str
 ):
     is_admin = getattr(request.state, 'admin', False)
@@ -42,12 +66,16 @@ async def get_single_usuario(
 
     if not is_admin and usuario_id != requesting_user_id:
         raise HTTPException(status_code=403, detail="No tienes permiso para ver este usuario.")
-        
+
+    version = await get_usuario_version(usuario_id)
+    not_modified = if_none_match(request, version)
+    if not_modified:
+        return not_modified
     result = await get_usuario_by_id(usuario_id)
+    set_etag(response, version)
     return result
 
-@router.put("/{usuario_id}", summary="Actualizar usuario", response_model=Usuario)
-@validateuser
+@router.put("/{usuario_id}", summary="Actualizar usuario", response_model=UsuarioSalida)
 async def update_single_usuario(
     request: Request,
     usuario_id: str,
@@ -66,11 +94,10 @@ async def update_single_usuario(
         if usuario_data.firebase_uid != current_user.firebase_uid:
             raise HTTPException(status_code=403, detail="No tienes permiso para cambiar tu Firebase UID.")
 
-    result = await update_usuario(usuario_id, usuario_data)
+    result = await update_usuario(usuario_id, usuario_data, request.state.permisos)
     return result
 
-@router.delete("/{usuario_id}", summary="Eliminar usuario")
-@validateadmin
+@router.delete("/{usuario_id}", summary="Eliminar usuario", dependencies=[Depends(require_permission("usuarios:gestionar"))])
 async def delete_single_usuario(
     request: Request,
     usuario_id: str
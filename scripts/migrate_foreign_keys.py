@@ -0,0 +1,170 @@
+"""Convert string foreign keys to ObjectId in place.
+
+Walks tareas, proyectos and usuarios in _id order, in batches, and rewrites
+id_proyecto / estado_tarea / categoria_tarea, estado and rol:
+
+- 24-hex strings become the matching ObjectId,
+- empty strings become null,
+- any other string is treated as a name and resolved against the referenced
+  collection (e.g. rol "admin" -> roles.nombre_rol "admin").
+
+Progress is checkpointed per collection in the ``migraciones`` collection,
+so an interrupted run resumes after the last finished batch. Each update is
+guarded by the old value, so documents written by the API meanwhile are not
+overwritten. Values that cannot be resolved are logged and left as they are;
+rerun with --reset (optionally with --create-missing) once the catalogs are
+fixed.
+
+    python scripts/migrate_foreign_keys.py [--batch-size 500] [--dry-run] [--reset] [--create-missing]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.mongodb import get_database, close_mongo_client
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("migrate_foreign_keys")
+
+MIGRATION = "fk_object_id"
+
+# collection -> {field: (referenced collection, name field)}
+FOREIGN_KEYS = {
+    "tareas": {
+        "id_proyecto": ("proyectos", "nombre_proyecto"),
+        "estado_tarea": ("estados_tarea", "nombre_estado"),
+        "categoria_tarea": ("categorias_tarea", "nombre_categoria"),
+    },
+    "proyectos": {
+        "estado": ("estados_proyecto", "nombre_estado"),
+    },
+    "usuarios": {
+        "rol": ("roles", "nombre_rol"),
+    },
+}
+
+# Catalogs where --create-missing may insert an entry for an unknown name
+CATALOGS = {"estados_tarea", "estados_proyecto", "categorias_tarea", "roles"}
+
+
+class NameResolver:
+    def __init__(self, db, create_missing: bool, dry_run: bool):
+        self.db = db
+        self.create_missing = create_missing
+        self.dry_run = dry_run
+        self.cache = {}
+
+    async def resolve(self, collection: str, name_field: str, name: str):
+        key = (collection, name)
+        if key in self.cache:
+            return self.cache[key]
+
+        doc = await self.db[collection].find_one({name_field: name}, {"_id": 1})
+        if doc is None and name_field != "nombre_proyecto":
+            doc = await self.db[collection].find_one({name_field: name.strip().lower()}, {"_id": 1})
+        if doc is None and self.create_missing and collection in CATALOGS and not self.dry_run:
+            doc = await self.db[collection].find_one_and_update(
+                {name_field: name.strip().lower()},
+                {"$setOnInsert": {name_field: name.strip().lower()}},
+                projection={"_id": 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            logger.info(f"Created {collection} entry '{name}'")
+
+        self.cache[key] = doc["_id"] if doc else None
+        return self.cache[key]
+
+
+async def convert(value, target: tuple, resolver: NameResolver):
+    if value == "":
+        return None
+    if ObjectId.is_valid(value):
+        return ObjectId(value)
+    return await resolver.resolve(target[0], target[1], value)
+
+
+async def migrate_collection(db, name: str, fields: dict, batch_size: int, resolver: NameResolver, dry_run: bool, reset: bool):
+    checkpoints = db["migraciones"]
+    checkpoint_id = f"{MIGRATION}.{name}"
+    if reset and not dry_run:
+        await checkpoints.delete_one({"_id": checkpoint_id})
+
+    state = await checkpoints.find_one({"_id": checkpoint_id}) or {}
+    if state.get("done") and not reset:
+        logger.info(f"{name}: already migrated")
+        return
+    last_id = state.get("last_id")
+    converted = state.get("converted", 0)
+    unresolved = state.get("unresolved", 0)
+
+    projection = {field: 1 for field in fields}
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id else {}
+        batch = await db[name].find(query, projection).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+
+        operations = []
+        for doc in batch:
+            changes = {}
+            for field, target in fields.items():
+                value = doc.get(field)
+                if not isinstance(value, str):
+                    continue
+                new_value = await convert(value, target, resolver)
+                if new_value is None and value != "":
+                    unresolved += 1
+                    logger.warning(f"{name} {doc['_id']}: cannot resolve {field}='{value}'")
+                    continue
+                changes[field] = new_value
+            if changes:
+                guard = {"_id": doc["_id"], **{field: doc[field] for field in changes}}
+                operations.append(UpdateOne(guard, {"$set": changes}))
+
+        if operations and not dry_run:
+            result = await db[name].bulk_write(operations, ordered=False)
+            converted += result.modified_count
+        elif dry_run:
+            converted += len(operations)
+
+        last_id = batch[-1]["_id"]
+        if not dry_run:
+            await checkpoints.update_one(
+                {"_id": checkpoint_id},
+                {"$set": {"last_id": last_id, "converted": converted, "unresolved": unresolved}},
+                upsert=True
+            )
+        logger.info(f"{name}: up to {last_id}, {converted} documents converted, {unresolved} unresolved values")
+
+    if not dry_run:
+        await checkpoints.update_one({"_id": checkpoint_id}, {"$set": {"done": unresolved == 0}}, upsert=True)
+    logger.info(f"{name}: finished ({converted} converted, {unresolved} unresolved)")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    parser.add_argument("--reset", action="store_true", help="ignore saved checkpoints and start over")
+    parser.add_argument("--create-missing", action="store_true", help="insert unknown state/category/role names into their catalog")
+    args = parser.parse_args()
+
+    db = get_database()
+    resolver = NameResolver(db, args.create_missing, args.dry_run)
+    try:
+        for name, fields in FOREIGN_KEYS.items():
+            await migrate_collection(db, name, fields, args.batch_size, resolver, args.dry_run, args.reset)
+    finally:
+        await close_mongo_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,5 +1,9 @@
+import asyncio
 import pytest
-from utils.mongodb import get_mongo_client, t_connection, get_collection
+from datetime import datetime
+from utils import mongodb
+from utils.mongodb import get_mongo_client, t_connection, get_collection, close_mongo_client
+from utils.invalidation import InvalidationWatcher, subscribe
 import os
 from dotenv import load_dotenv
 
@@ -14,7 +18,7 @@ def test_env_variables():
 
 def test_connect():
     try:
-        connection_result = t_connection()
+        connection_result = asyncio.run(t_connection())
         assert connection_result is True, "La conexion a la BD Fallo"
     except Exception as e:
         pytest.fail( f"Error en la conexion a MongoDB { str(e) } " )
@@ -33,4 +37,29 @@ def test_get_collection():
     except Exception as e:
         pytest.fail( f"Error en el llamado del cliente { str(e) } " )
 
+def test_invalidation_watcher():
+    # Needs a replica set (a local single-node one is enough) or falls back to polling
+    async def run():
+        mongodb._client = None  # the client of the previous tests belongs to a closed event loop
+        received = []
+        subscribe("test_invalidation", received.append)
+        watcher = InvalidationWatcher(collections=("test_invalidation",), poll_interval=0.5)
+        watcher.start()
+        try:
+            await asyncio.sleep(1)
+            coll = get_collection("test_invalidation")
+            inserted = await coll.insert_one({"fecha_actualizacion": datetime.now()})
+            for _ in range(50):
+                if str(inserted.inserted_id) in received:
+                    break
+                await asyncio.sleep(0.1)
+            await coll.drop()
+            return str(inserted.inserted_id) in received
+        finally:
+            await watcher.stop()
+            await close_mongo_client()
 
+    try:
+        assert asyncio.run(run()) is True, "La invalidacion no llego al suscriptor"
+    except Exception as e:
+        pytest.fail( f"Error en la invalidacion de caches { str(e) } " )
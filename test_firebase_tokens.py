@@ -0,0 +1,133 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+import httpx
+import jwt
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from fastapi import HTTPException
+from utils import firebase_tokens
+from utils.firebase_tokens import FirebaseCertificates, verify_firebase_token, FIREBASE_CERTS_REFRESH_MARGIN, FIREBASE_CERTS_RETRY_INTERVAL
+
+PROJECT_ID = "proyecto-prueba"
+KID = "clave-1"
+
+
+def make_certificate():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "securetoken.system.gserviceaccount.com")])
+    now = datetime.now(timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    return key, certificate.public_bytes(serialization.Encoding.PEM).decode("utf-8")
+
+PRIVATE_KEY, CERTIFICATE_PEM = make_certificate()
+
+
+def firebase_token(key=PRIVATE_KEY, kid=KID, algorithm="RS256", **overrides):
+    now = int(time.time())
+    claims = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+        "aud": PROJECT_ID,
+        "sub": "uid-1",
+        "email": "a@b.co",
+        "email_verified": True,
+        "iat": now,
+        "auth_time": now,
+        "exp": now + 3600,
+    }
+    claims.update(overrides)
+    return jwt.encode(claims, key, algorithm=algorithm, headers={"kid": kid})
+
+
+class FakeCertificatesEndpoint:
+    def __init__(self, cache_control="public, max-age=7200, must-revalidate"):
+        self.cache_control = cache_control
+        self.calls = 0
+
+    async def __call__(self, method, url, **kwargs):
+        self.calls += 1
+        headers = {"cache-control": self.cache_control} if self.cache_control else {}
+        return httpx.Response(200, json={KID: CERTIFICATE_PEM}, headers=headers, request=httpx.Request(method, url))
+
+
+@pytest.fixture
+def endpoint(monkeypatch):
+    fake = FakeCertificatesEndpoint()
+    monkeypatch.setattr(firebase_tokens, "request_with_retry", fake)
+    certificates = FirebaseCertificates(url="https://certs.test")
+    monkeypatch.setattr(firebase_tokens, "certificates", certificates)
+    asyncio.run(certificates.refresh())
+    return fake
+
+
+def rejected(token) -> int:
+    with pytest.raises(HTTPException) as error:
+        verify_firebase_token(token, project_id=PROJECT_ID)
+    return error.value.status_code
+
+
+def test_valid_token(endpoint):
+    claims = verify_firebase_token(firebase_token(), project_id=PROJECT_ID)
+    assert claims["sub"] == "uid-1"
+
+def test_wrong_audience_or_issuer_is_rejected(endpoint):
+    assert rejected(firebase_token(aud="otro-proyecto")) == 401
+    assert rejected(firebase_token(iss="https://securetoken.google.com/otro-proyecto")) == 401
+
+def test_expired_token_is_rejected(endpoint):
+    past = int(time.time()) - 7200
+    assert rejected(firebase_token(iat=past, auth_time=past, exp=past + 3600)) == 401
+
+def test_auth_time_in_the_future_is_rejected(endpoint):
+    assert rejected(firebase_token(auth_time=int(time.time()) + 600)) == 401
+
+def test_other_algorithms_are_rejected(endpoint):
+    assert rejected(firebase_token(key="secreto-compartido-de-al-menos-32-bytes", algorithm="HS256")) == 401
+
+def test_token_signed_by_another_key_is_rejected(endpoint):
+    other_key, _ = make_certificate()
+    assert rejected(firebase_token(key=other_key)) == 401
+
+def test_unknown_kid_triggers_one_rate_limited_refresh(endpoint, monkeypatch):
+    async def run():
+        certificates = firebase_tokens.certificates
+        # As if the last fetch were older than the retry interval
+        certificates._last_refresh = time.monotonic() - FIREBASE_CERTS_RETRY_INTERVAL - 1
+        assert rejected(firebase_token(kid="rotada")) == 401
+        assert rejected(firebase_token(kid="otra-rotada")) == 401
+        await certificates._refreshing
+        assert rejected(firebase_token(kid="una-mas")) == 401
+
+    calls_before = endpoint.calls
+    asyncio.run(run())
+    assert endpoint.calls == calls_before + 1, "Los kid desconocidos no se limitaron a una descarga"
+
+def test_no_certificates_yet_is_unavailable(monkeypatch):
+    monkeypatch.setattr(firebase_tokens, "certificates", FirebaseCertificates(url="https://certs.test"))
+    assert rejected(firebase_token()) == 503
+
+def test_refresh_interval_follows_max_age(endpoint, monkeypatch):
+    certificates = FirebaseCertificates(url="https://certs.test")
+    asyncio.run(certificates.refresh())
+    assert abs(certificates.expires_at - time.time() - 7200) < 5
+    assert abs(certificates._next_refresh_in() - (7200 - FIREBASE_CERTS_REFRESH_MARGIN)) < 5
+
+    endpoint.cache_control = None
+    asyncio.run(certificates.refresh())
+    assert abs(certificates.expires_at - time.time() - 3600) < 5, "Sin max-age no se uso el valor por defecto"
+
+    endpoint.cache_control = "max-age=10"
+    asyncio.run(certificates.refresh())
+    assert certificates._next_refresh_in() == FIREBASE_CERTS_RETRY_INTERVAL, "El intervalo bajo del minimo"
@@ -0,0 +1,93 @@
+import asyncio
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from controllers import rol as rol_controller
+from models.rol import Rol
+from utils.permissions import PERMISOS, compile_permissions, default_permissions, missing_permissions
+
+GESTOR_CATALOGOS = compile_permissions(["catalogos:gestionar", "tareas:leer"])
+GESTOR_USUARIOS = compile_permissions(["usuarios:gestionar", "tareas:leer"])
+ADMIN = compile_permissions(PERMISOS)
+
+
+class FakeRoles:
+    def __init__(self):
+        self.inserted = []
+
+    async def insert_one(self, doc, session=None):
+        self.inserted.append(doc)
+
+        class Result:
+            inserted_id = ObjectId()
+        return Result()
+
+
+class FakeRolesCache:
+    def __init__(self, roles=()):
+        self.roles = {rol.id: rol for rol in roles}
+
+    async def get(self, rol_id):
+        return self.roles.get(rol_id)
+
+    def invalidate(self):
+        pass
+
+
+@pytest.fixture
+def roles(monkeypatch):
+    admin = Rol(id=str(ObjectId()), nombre_rol="admin")
+    coll = FakeRoles()
+    monkeypatch.setattr(rol_controller, "coll", coll)
+    monkeypatch.setattr(rol_controller, "roles_cache", FakeRolesCache([admin]))
+
+    async def no_bump(name):
+        pass
+    monkeypatch.setattr(rol_controller, "bump_generation", no_bump)
+    return coll, admin
+
+
+def test_missing_permissions():
+    assert missing_permissions(ADMIN, ADMIN) == []
+    assert missing_permissions(compile_permissions(["admin", "tareas:leer"]), GESTOR_CATALOGOS) == ["admin"]
+
+def test_any_named_role_keeps_the_former_user_permissions():
+    assert default_permissions("docente") == default_permissions("usuario")
+    assert default_permissions("") == 0
+
+def test_catalog_manager_cannot_create_an_admin_role(roles):
+    coll, _ = roles
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(rol_controller.create_rol(Rol(nombre_rol="escalada", permisos=["admin"]), GESTOR_CATALOGOS))
+    assert error.value.status_code == 403
+    assert coll.inserted == [], "Se creo un rol con permisos que el usuario no tiene"
+
+def test_catalog_manager_cannot_create_a_role_named_admin_without_permisos(roles):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(rol_controller.create_rol(Rol(nombre_rol="Admin"), GESTOR_CATALOGOS))
+    assert error.value.status_code == 403
+
+def test_catalog_manager_can_create_roles_within_their_permissions(roles):
+    coll, _ = roles
+    rol = asyncio.run(rol_controller.create_rol(Rol(nombre_rol="lector", permisos=["tareas:leer"]), GESTOR_CATALOGOS))
+    assert rol.id is not None
+    assert len(coll.inserted) == 1
+
+def test_catalog_manager_cannot_change_or_delete_the_admin_role(roles):
+    _, admin = roles
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(rol_controller.update_rol(admin.id, Rol(nombre_rol="admin", permisos=[]), GESTOR_CATALOGOS))
+    assert error.value.status_code == 403
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(rol_controller.delete_rol(admin.id, GESTOR_CATALOGOS))
+    assert error.value.status_code == 403
+
+def test_user_manager_cannot_assign_the_admin_role(roles):
+    _, admin = roles
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(rol_controller.check_rol_assignable(admin.id, GESTOR_USUARIOS))
+    assert error.value.status_code == 403
+    with pytest.raises(HTTPException):
+        asyncio.run(rol_controller.check_rol_assignable("admin", GESTOR_USUARIOS))
+
+    asyncio.run(rol_controller.check_rol_assignable(admin.id, ADMIN))
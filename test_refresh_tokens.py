@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from fastapi import HTTPException
+from utils import refresh_tokens
+from utils.refresh_tokens import issue_refresh_token, rotate_refresh_token, revoke_refresh_token
+
+
+class FakeRefreshTokens:
+    def __init__(self):
+        self.docs = {}
+
+    async def insert_one(self, doc):
+        self.docs[doc["_id"]] = dict(doc)
+
+    async def find_one(self, query, projection=None):
+        return self.docs.get(query["_id"])
+
+    async def find_one_and_update(self, query, update, return_document=None):
+        doc = self.docs.get(query["_id"])
+        if doc is None or doc["usado"] is not None or doc["expira"] <= query["expira"]["$gt"]:
+            return None
+        before = dict(doc)
+        doc.update(update["$set"])
+        return before
+
+    async def delete_many(self, query):
+        family = [key for key, doc in self.docs.items() if doc["familia"] == query["familia"]]
+        for key in family:
+            del self.docs[key]
+
+        class Result:
+            deleted_count = len(family)
+        return Result()
+
+
+@pytest.fixture
+def store(monkeypatch):
+    coll = FakeRefreshTokens()
+    monkeypatch.setattr(refresh_tokens, "coll", coll)
+    return coll
+
+
+def test_rotation_issues_a_token_of_the_same_family(store):
+    usuario_id = str(ObjectId())
+    token = asyncio.run(issue_refresh_token(usuario_id))
+
+    rotated_for, new_token = asyncio.run(rotate_refresh_token(token))
+
+    assert rotated_for == usuario_id
+    assert new_token != token
+    assert len({doc["familia"] for doc in store.docs.values()}) == 1, "La rotacion cambio de familia"
+    assert token not in str(store.docs), "Se guardo el token en lugar de su hash"
+
+def test_reused_token_revokes_its_family(store):
+    token = asyncio.run(issue_refresh_token(str(ObjectId())))
+    _, new_token = asyncio.run(rotate_refresh_token(token))
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(rotate_refresh_token(token))
+    assert error.value.status_code == 401
+    assert store.docs == {}, "La reutilizacion no revoco la familia"
+
+    with pytest.raises(HTTPException):
+        asyncio.run(rotate_refresh_token(new_token))
+
+def test_reuse_leaves_other_families_alone(store):
+    other = asyncio.run(issue_refresh_token(str(ObjectId())))
+    token = asyncio.run(issue_refresh_token(str(ObjectId())))
+    asyncio.run(rotate_refresh_token(token))
+
+    with pytest.raises(HTTPException):
+        asyncio.run(rotate_refresh_token(token))
+    assert asyncio.run(rotate_refresh_token(other))[1], "Se revoco una familia ajena"
+
+def test_expired_token_is_rejected(store):
+    token = asyncio.run(issue_refresh_token(str(ObjectId())))
+    for doc in store.docs.values():
+        doc["expira"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(rotate_refresh_token(token))
+    assert error.value.status_code == 401
+
+def test_unknown_token_is_rejected(store):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(rotate_refresh_token("unknown"))
+    assert error.value.status_code == 401
+
+def test_logout_revokes_the_family(store):
+    token = asyncio.run(issue_refresh_token(str(ObjectId())))
+    _, new_token = asyncio.run(rotate_refresh_token(token))
+
+    assert asyncio.run(revoke_refresh_token(new_token)) is True
+    assert store.docs == {}
+    assert asyncio.run(revoke_refresh_token(new_token)) is False
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import uuid
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from utils import response_cache
+from utils.response_cache import MemoryBackend, RedisBackend, bump_generation, cache_response
+
+
+class Elemento(BaseModel):
+    id: str
+    nombre: str
+
+
+def make_app():
+    app = FastAPI()
+    calls = []
+
+    @app.middleware("http")
+    async def rol_from_header(request: Request, call_next):
+        # Stands in for the auth middleware, which leaves the role in request.state
+        request.state.rol = request.headers.get("x-rol", "usuario")
+        return await call_next(request)
+
+    @app.get("/elementos")
+    @cache_response("elementos", depends=("tareas", "estados_tarea"))
+    async def elementos(request: Request, response: Response, skip: int = 0):
+        calls.append(skip)
+        response.headers["X-Next-Cursor"] = f"cursor-{skip}"
+        return [Elemento(id=str(skip), nombre=f"elemento {len(calls)}")]
+
+    return TestClient(app), calls
+
+
+def check_backend(client, calls):
+    first = client.get("/elementos")
+    second = client.get("/elementos")
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT", "La segunda peticion no salio de la cache"
+    assert second.content == first.content
+    assert second.headers["x-next-cursor"] == "cursor-0", "No se repitio la cabecera X-Next-Cursor"
+    assert len(calls) == 1
+
+    client.portal.call(bump_generation, "estados_tarea")
+    third = client.get("/elementos")
+    assert third.headers["x-cache"] == "MISS", "Un cambio en una dependencia no invalido la respuesta"
+    assert third.content != first.content
+
+    client.portal.call(bump_generation, "proyectos")
+    assert client.get("/elementos").headers["x-cache"] == "HIT", "Un cambio ajeno invalido la respuesta"
+
+
+def test_memory_backend(monkeypatch):
+    monkeypatch.setattr(response_cache, "backend", MemoryBackend())
+    client, calls = make_app()
+    with client:
+        check_backend(client, calls)
+
+def test_role_and_query_are_part_of_the_key(monkeypatch):
+    monkeypatch.setattr(response_cache, "backend", MemoryBackend())
+    client, calls = make_app()
+    with client:
+        client.get("/elementos")
+        assert client.get("/elementos", headers={"x-rol": "admin"}).headers["x-cache"] == "MISS", "Se compartio la respuesta entre roles"
+        assert client.get("/elementos?skip=10").headers["x-cache"] == "MISS", "Se ignoro la consulta en la clave"
+        assert client.get("/elementos?skip=10").headers["x-next-cursor"] == "cursor-10"
+    assert calls == [0, 0, 10]
+
+def test_expired_entries_are_not_served(monkeypatch):
+    backend = MemoryBackend()
+    asyncio.run(backend.set("clave", b"valor", ttl=-1))
+    assert asyncio.run(backend.get("clave")) is None
+
+def test_redis_backend(monkeypatch):
+    pytest.importorskip("redis")
+    url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+    async def ping():
+        client = RedisBackend(url).client
+        try:
+            await client.ping()
+        finally:
+            await client.aclose()
+    try:
+        asyncio.run(ping())
+    except Exception as e:
+        pytest.skip(f"No Redis server at {url}: {e}")
+
+    client, calls = make_app()
+    with client:
+        # Own prefix per run, so leftovers of earlier runs are never hits
+        monkeypatch.setattr(response_cache, "backend", RedisBackend(url, prefix=f"test:{uuid.uuid4().hex}:"))
+        check_backend(client, calls)
@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from utils import revocation, security
+from utils.invalidation import publish
+from utils.revocation import BloomFilter, RevocationList
+
+
+class FakeRevokedTokens:
+    def __init__(self, jtis=()):
+        self.jtis = set(jtis)
+        self.lookups = 0
+
+    async def find_one(self, query, projection=None):
+        self.lookups += 1
+        return {"_id": query["_id"]} if query["_id"] in self.jtis else None
+
+    async def _documents(self):
+        for jti in list(self.jtis):
+            yield {"_id": jti}
+
+    def find(self, query, projection=None):
+        return self._documents()
+
+
+def revocation_list_with(monkeypatch, stored):
+    coll = FakeRevokedTokens(stored)
+    monkeypatch.setattr(revocation, "get_collection", lambda name: coll)
+    return RevocationList(capacity=1000, error_rate=0.001), coll
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.001)
+    added = [f"jti-{i}" for i in range(1000)]
+    for jti in added:
+        bloom.add(jti)
+
+    assert all(jti in bloom for jti in added), "El filtro perdio un elemento agregado"
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 50, f"Demasiados falsos positivos: {false_positives}"
+
+def test_unrevoked_token_does_not_reach_the_store(monkeypatch):
+    revocations, coll = revocation_list_with(monkeypatch, ["revoked"])
+    asyncio.run(revocations.load())
+
+    assert asyncio.run(revocations.is_revoked("valid")) is False
+    assert coll.lookups == 0, "Un negativo del filtro consulto la base de datos"
+
+def test_filter_positive_is_confirmed_once(monkeypatch):
+    revocations, coll = revocation_list_with(monkeypatch, ["revoked"])
+    asyncio.run(revocations.load())
+
+    assert asyncio.run(revocations.is_revoked("revoked")) is True
+    assert asyncio.run(revocations.is_revoked("revoked")) is True
+    assert coll.lookups == 1, "La confirmacion no se reutilizo"
+    assert revocations.stats()["revoked_hits"] == 2
+
+def test_false_positive_is_answered_by_the_store(monkeypatch):
+    revocations, coll = revocation_list_with(monkeypatch, [])
+    asyncio.run(revocations.load())
+    # In the filter but not in the store, as a false positive would be
+    revocations._filter.add("valid")
+
+    assert asyncio.run(revocations.is_revoked("valid")) is False
+    assert asyncio.run(revocations.is_revoked("valid")) is False
+    assert coll.lookups == 1
+    assert revocations.stats()["false_positives"] == 2
+
+def test_unloaded_list_asks_the_store(monkeypatch):
+    revocations, coll = revocation_list_with(monkeypatch, ["revoked"])
+
+    assert asyncio.run(revocations.is_revoked("revoked")) is True, "Sin filtro cargado se acepto un token revocado"
+    assert coll.lookups == 1
+
+def test_revocation_clears_a_cached_negative(monkeypatch):
+    revocations, coll = revocation_list_with(monkeypatch, [])
+    asyncio.run(revocations.load())
+    revocations._filter.add("jti")
+    assert asyncio.run(revocations.is_revoked("jti")) is False
+
+    coll.jtis.add("jti")
+    revocations.add("jti")
+    assert asyncio.run(revocations.is_revoked("jti")) is True, "Se sirvio una confirmacion obsoleta"
+
+def test_ttl_deletes_do_not_reach_the_filter(monkeypatch):
+    revocations, _ = revocation_list_with(monkeypatch, [])
+    asyncio.run(revocations.load())
+
+    publish(revocation.COLLECTION, "expired", deleted=True)
+    assert "expired" not in revocations._filter, "Un borrado por TTL se agrego al filtro"
+    publish(revocation.COLLECTION, "revoked")
+    assert "revoked" in revocations._filter
+
+def test_dependency_rejects_revoked_tokens(monkeypatch):
+    revocations, coll = revocation_list_with(monkeypatch, [])
+    asyncio.run(revocations.load())
+    monkeypatch.setattr(security, "revocation_list", revocations)
+    token = security.create_jwt_token("1", "a@b.co", "A", "usuario")
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    assert asyncio.run(security.get_current_user(credentials))["id"] == "1"
+
+    claims = security.decode_token(token)
+    coll.jtis.add(claims["jti"])
+    revocations.add(claims["jti"])
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(security.get_current_user(credentials))
+    assert error.value.status_code == 401, "get_current_user acepto un token revocado"
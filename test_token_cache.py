@@ -0,0 +1,58 @@
+import time
+import jwt
+import pytest
+from datetime import timedelta
+from utils import token_cache as token_cache_module
+from utils.token_cache import TokenCache
+from utils.security import create_jwt_token, decode_token, SECRET_KEY, token_cache
+
+
+def test_cached_claims_are_served_until_exp():
+    cache = TokenCache(max_entries=10, enabled=True)
+    cache.put("token", {"id": "1", "exp": time.time() + 60})
+
+    assert cache.get("token")["id"] == "1", "Los claims cacheados no se devolvieron"
+    assert cache.stats()["hits"] == 1
+
+def test_expired_entry_is_not_served(monkeypatch):
+    cache = TokenCache(max_entries=10, enabled=True)
+    now = time.time()
+    cache.put("token", {"id": "1", "exp": now + 60})
+
+    monkeypatch.setattr(token_cache_module.time, "time", lambda: now + 61)
+    assert cache.get("token") is None, "Se sirvio un token despues de su expiracion"
+    assert cache.stats()["expired"] == 1
+    assert cache.stats()["size"] == 0, "La entrada expirada no se elimino"
+
+def test_expired_token_is_rejected_even_if_cached():
+    token = create_jwt_token("1", "a@b.co", "A", "usuario", expires_delta=timedelta(seconds=-1))
+    claims = jwt.decode(token, SECRET_KEY, algorithms=["HS256"], options={"verify_exp": False})
+    token_cache.put(token, claims)
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        decode_token(token)
+
+def test_kill_switch_disables_the_cache():
+    cache = TokenCache(max_entries=10, enabled=False)
+    cache.put("token", {"id": "1", "exp": time.time() + 60})
+
+    assert cache.get("token") is None, "La cache deshabilitada devolvio claims"
+    assert cache.stats()["size"] == 0
+
+def test_tokens_without_exp_are_not_cached():
+    cache = TokenCache(max_entries=10, enabled=True)
+    cache.put("token", {"id": "1"})
+
+    assert cache.get("token") is None, "Se cacheo un token sin exp"
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TokenCache(max_entries=2, enabled=True)
+    exp = time.time() + 60
+    cache.put("a", {"exp": exp})
+    cache.put("b", {"exp": exp})
+    cache.get("a")
+    cache.put("c", {"exp": exp})
+
+    assert cache.get("b") is None, "No se desalojo la entrada menos usada"
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,110 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Generic, Optional, TypeVar
+from pydantic import BaseModel
+from utils.mongodb import get_collection
+from utils.invalidation import subscribe
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+
+M = TypeVar("M", bound=BaseModel)
+
+CATALOGS: dict[str, "CatalogCache"] = {}
+
+class CatalogCache(Generic[M]):
+    """Whole small collection kept in memory, reloaded after the TTL or an invalidation."""
+
+    def __init__(self, collection: str, model: type[M], name_field: str, ttl: float = CATALOG_CACHE_TTL):
+        self.collection = collection
+        self.model = model
+        self.name_field = name_field
+        self.ttl = ttl
+        self._items: dict[str, M] = {}
+        self._ids_by_name: dict[str, str] = {}
+        self._loaded_at: Optional[float] = None
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        CATALOGS[collection] = self
+        # Writes made by any worker, seen by the invalidation watcher
+        subscribe(collection, lambda document_id: self.invalidate())
+
+    def _fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    async def load(self):
+        generation = self._generation
+        items = {}
+        # Always from the primary: the cache is what later reads trust
+        async for doc in get_collection(self.collection).find().sort("_id", 1):
+            doc["id"] = str(doc.pop("_id"))
+            items[doc["id"]] = self.model(**doc)
+        self._items = items
+        self._ids_by_name = {getattr(item, self.name_field): item_id for item_id, item in items.items()}
+        # A write that landed while loading leaves the cache stale: keep it expired
+        self._loaded_at = time.monotonic() if generation == self._generation else None
+
+    async def _ensure(self):
+        if self._fresh():
+            self.hits += 1
+            return
+        async with self._lock:
+            if self._fresh():
+                self.hits += 1
+                return
+            self.misses += 1
+            await self.load()
+
+    def invalidate(self):
+        self._generation += 1
+        self._loaded_at = None
+        self.invalidations += 1
+
+    async def all(self) -> list[M]:
+        await self._ensure()
+        return [item.model_copy() for item in self._items.values()]
+
+    async def get(self, item_id: str) -> Optional[M]:
+        await self._ensure()
+        item = self._items.get(item_id)
+        return item.model_copy() if item else None
+
+    async def id_for(self, name: str) -> Optional[str]:
+        await self._ensure()
+        return self._ids_by_name.get(name)
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "size": len(self._items),
+            "fresh": self._fresh(),
+            "age_s": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at is not None else None,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / requests, 3) if requests else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+def sort_items(items: list[M], sort_spec: list[tuple[str, int]]) -> list[M]:
+    # Stable sorts from the last key to the first reproduce a compound sort
+    for field, direction in reversed(sort_spec):
+        key = "id" if field == "_id" else field
+        items.sort(key=lambda item: getattr(item, key), reverse=direction < 0)
+    return items
+
+async def warm_up_catalogs():
+    for name, cache in CATALOGS.items():
+        try:
+            await cache.load()
+        except Exception as e:
+            logger.error(f"Could not warm up the {name} cache: {e}")
+
+def catalog_stats() -> dict:
+    return {name: cache.stats() for name, cache in CATALOGS.items()}
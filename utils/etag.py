@@ -0,0 +1,40 @@
+from datetime import datetime, timezone
+from typing import Optional, Sequence
+from fastapi import Request, Response
+
+def _millis(updated: Optional[datetime]) -> str:
+    if updated is None:
+        return "0"
+    # Millisecond precision, the resolution BSON dates are stored with
+    if updated.tzinfo is None:
+        updated = updated.replace(tzinfo=timezone.utc)
+    return f"{int(updated.timestamp() * 1000):x}"
+
+def make_etag(versions: Optional[Sequence[Optional[datetime]]]) -> Optional[str]:
+    # The document's own version first, then those of the documents joined into the body
+    if not versions or versions[0] is None:
+        return None
+    return '"' + "-".join(_millis(updated) for updated in versions) + '"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison: W/ prefixes are ignored
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+def if_none_match(request: Request, versions: Optional[Sequence[Optional[datetime]]]) -> Optional[Response]:
+    # Answers with 304 when the client's copy is current
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    etag = make_etag(versions)
+    if etag and etag_matches(header, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+def set_etag(response: Response, versions: Optional[Sequence[Optional[datetime]]]):
+    # Read before the body: a write in between makes the tag older, never newer, than the body
+    etag = make_etag(versions)
+    if etag:
+        response.headers["ETag"] = etag
@@ -0,0 +1,53 @@
+from functools import lru_cache
+from typing import Iterable, Optional
+from fastapi import HTTPException
+from fastapi.responses import Response
+from pydantic import BaseModel, create_model
+from utils.json_response import models_json
+
+def parse_fields(fields: Optional[str], model: type[BaseModel], required: Iterable[str] = ()) -> Optional[tuple[str, ...]]:
+    if fields is None:
+        return None
+    allowed = model.model_fields
+    selected = set()
+    for part in fields.split(","):
+        name = part.strip()
+        if not name:
+            continue
+        if name not in allowed:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid field '{name}'. Allowed: {', '.join(allowed)}"
+            )
+        selected.add(name)
+
+    if not selected:
+        raise HTTPException(status_code=400, detail="Fields parameter is empty")
+
+    # id (and the sort keys, needed for the next cursor) always come back
+    selected.add("id")
+    selected.update(name for name in required if name in allowed)
+    return tuple(name for name in allowed if name in selected)
+
+@lru_cache(maxsize=128)
+def partial_model(model: type[BaseModel], fields: tuple[str, ...]) -> type[BaseModel]:
+    # Same field definitions (validators included), only the selected ones
+    definitions = {name: (model.model_fields[name].annotation, model.model_fields[name]) for name in fields}
+    return create_model(f"{model.__name__}Parcial", **definitions)
+
+def project_stage(projection: dict, fields: Optional[tuple[str, ...]] = None) -> dict:
+    if fields is None:
+        return {"$project": projection}
+    return {"$project": {"_id": 0, **{name: value for name, value in projection.items() if name in fields}}}
+
+def lookup_stages(lookups: list[tuple[tuple[str, ...], list]], fields: Optional[tuple[str, ...]] = None) -> list:
+    # Each lookup is skipped when none of the names it provides was requested
+    stages = []
+    for provides, lookup in lookups:
+        if fields is None or any(name in fields for name in provides):
+            stages.extend(lookup)
+    return stages
+
+def fields_response(items: list[BaseModel], headers: Optional[dict] = None) -> Response:
+    # Serialized with the trimmed models; the route's response_model would refill the defaults
+    return Response(content=models_json(items), media_type="application/json", headers=headers)
@@ -0,0 +1,138 @@
+import os
+import re
+import time
+import asyncio
+import logging
+from typing import Optional
+import jwt
+from cryptography.x509 import load_pem_x509_certificate
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+from jwt import PyJWTError
+from utils.http_client import request_with_retry
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+FIREBASE_PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID")
+FIREBASE_CERTS_URL = os.getenv("FIREBASE_CERTS_URL", "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com")
+# Refresh this long before the certificates' max-age runs out
+FIREBASE_CERTS_REFRESH_MARGIN = float(os.getenv("FIREBASE_CERTS_REFRESH_MARGIN", "300"))
+FIREBASE_CERTS_RETRY_INTERVAL = float(os.getenv("FIREBASE_CERTS_RETRY_INTERVAL", "30"))
+
+class FirebaseCertificates:
+    """Google's signing keys for Firebase ID tokens, refreshed off the request path."""
+
+    def __init__(self, url: str = FIREBASE_CERTS_URL):
+        self.url = url
+        self._keys: dict[str, object] = {}
+        self.expires_at: Optional[float] = None
+        self._last_refresh = float("-inf")
+        self.refreshes = 0
+        self.errors = 0
+        self._task: Optional[asyncio.Task] = None
+        self._refreshing: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    async def refresh(self):
+        response = await request_with_retry("GET", self.url)
+        response.raise_for_status()
+        self._keys = {
+            kid: load_pem_x509_certificate(pem.encode("utf-8")).public_key()
+            for kid, pem in response.json().items()
+        }
+        match = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+        self.expires_at = time.time() + (int(match.group(1)) if match else 3600)
+        self.refreshes += 1
+        self._last_refresh = time.monotonic()
+
+    def _next_refresh_in(self) -> float:
+        if self.expires_at is None:
+            return FIREBASE_CERTS_RETRY_INTERVAL
+        return max(self.expires_at - time.time() - FIREBASE_CERTS_REFRESH_MARGIN, FIREBASE_CERTS_RETRY_INTERVAL)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Could not refresh Firebase signing certificates: {e}")
+            await asyncio.sleep(self._next_refresh_in())
+
+    def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping = True
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _refresh_soon(self):
+        # Unknown kid: Google may have rotated early. Fetch in the background, at most
+        # once per retry interval so forged kids cannot turn into a flood of fetches
+        if self._refreshing is not None and not self._refreshing.done():
+            return
+        if time.monotonic() - self._last_refresh < FIREBASE_CERTS_RETRY_INTERVAL:
+            return
+        self._refreshing = asyncio.create_task(self._safe_refresh())
+
+    async def _safe_refresh(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Could not refresh Firebase signing certificates: {e}")
+
+    def key_for(self, kid: Optional[str]):
+        if not self._keys:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Firebase signing certificates not loaded yet.")
+        key = self._keys.get(kid)
+        if key is None:
+            self._refresh_soon()
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Firebase ID token: unknown signing key.")
+        return key
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self._keys),
+            "expires_in_s": round(self.expires_at - time.time()) if self.expires_at else None,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+        }
+
+certificates = FirebaseCertificates()
+
+def verify_firebase_token(id_token: str, project_id: Optional[str] = FIREBASE_PROJECT_ID) -> dict:
+    if not project_id:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="FIREBASE_PROJECT_ID is not configured.")
+    try:
+        header = jwt.get_unverified_header(id_token)
+        if header.get("alg") != "RS256":
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Firebase ID token: unexpected algorithm.")
+        claims = jwt.decode(
+            id_token,
+            certificates.key_for(header.get("kid")),
+            algorithms=["RS256"],
+            audience=project_id,
+            issuer=f"https://securetoken.google.com/{project_id}",
+            options={"require": ["exp", "iat", "sub", "auth_time"]},
+        )
+        if not claims["sub"]:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Firebase ID token: empty subject.")
+        if claims["auth_time"] > time.time():
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Firebase ID token: auth_time in the future.")
+        return claims
+    except HTTPException:
+        raise
+    except PyJWTError as e:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid Firebase ID token: {e}")
@@ -0,0 +1,56 @@
+import os
+import random
+import asyncio
+import logging
+import importlib.util
+from typing import Optional
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.2"))
+
+# Upstream answers worth another try; anything else goes back to the caller as is
+RETRY_STATUS = {429, 502, 503, 504}
+
+_client: Optional[httpx.AsyncClient] = None
+
+def _http2_available() -> bool:
+    # httpx only speaks HTTP/2 with the optional h2 package installed
+    return importlib.util.find_spec("h2") is not None
+
+def open_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=_http2_available(),
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+        )
+    return _client
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+async def request_with_retry(method: str, url: str, retries: int = HTTP_RETRIES, **kwargs) -> httpx.Response:
+    client = open_http_client()
+    for attempt in range(retries + 1):
+        try:
+            response = await client.request(method, url, **kwargs)
+            if response.status_code not in RETRY_STATUS or attempt == retries:
+                return response
+            logger.warning(f"{method} {url.split('?')[0]} answered {response.status_code}, retrying")
+        except httpx.TransportError as e:
+            if attempt == retries:
+                raise
+            logger.warning(f"{method} {url.split('?')[0]} failed ({e!r}), retrying")
+        # Exponential backoff with jitter so retrying workers do not move in lockstep
+        await asyncio.sleep(HTTP_RETRY_BACKOFF * 2 ** attempt * (0.5 + random.random()))
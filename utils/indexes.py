@@ -0,0 +1,106 @@
+import logging
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+from utils.mongodb import get_database
+
+logger = logging.getLogger(__name__)
+
+INDEXES = {
+    "usuarios": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("firebase_uid", ASCENDING)], name="firebase_uid"),
+        IndexModel([("fecha_registro", DESCENDING), ("_id", DESCENDING)], name="fecha_registro_id"),
+    ],
+    "refresh_tokens": [
+        # Mongo removes each token once "expira" has passed
+        IndexModel([("expira", ASCENDING)], name="expira_ttl", expireAfterSeconds=0),
+        IndexModel([("familia", ASCENDING)], name="familia"),
+    ],
+    "tokens_revocados": [
+        # Kept only until the revoked token would have expired anyway
+        IndexModel([("expira", ASCENDING)], name="expira_ttl", expireAfterSeconds=0),
+        IndexModel([("fecha_actualizacion", ASCENDING)], name="fecha_actualizacion"),
+    ],
+    "proyectos": [
+        IndexModel([("nombre_proyecto", ASCENDING)], name="nombre_proyecto_unique", unique=True),
+        IndexModel([("fecha_creacion", DESCENDING), ("_id", DESCENDING)], name="fecha_creacion_id"),
+    ],
+    "tareas": [
+        IndexModel([("fecha_creacion", DESCENDING), ("_id", DESCENDING)], name="fecha_creacion_id"),
+        IndexModel([("id_proyecto", ASCENDING), ("fecha_creacion", DESCENDING)], name="id_proyecto_fecha_creacion"),
+    ],
+    "roles": [
+        IndexModel([("nombre_rol", ASCENDING)], name="nombre_rol_unique", unique=True),
+    ],
+    "estados_tarea": [
+        IndexModel([("nombre_estado", ASCENDING)], name="nombre_estado_unique", unique=True),
+    ],
+    "estados_proyecto": [
+        IndexModel([("nombre_estado", ASCENDING)], name="nombre_estado_unique", unique=True),
+    ],
+    "categorias_tarea": [
+        IndexModel([("nombre_categoria", ASCENDING)], name="nombre_categoria_unique", unique=True),
+    ],
+}
+
+def _same_definition(declared: dict, existing: dict) -> bool:
+    if list(declared["key"].items()) != [tuple(k) for k in existing["key"]]:
+        return False
+    for option in ("unique", "expireAfterSeconds", "sparse", "partialFilterExpression"):
+        if declared.get(option) != existing.get(option):
+            return False
+    return True
+
+async def check_indexes() -> dict:
+    db = get_database()
+    report = {}
+    for name, models in INDEXES.items():
+        existing = await db[name].index_information()
+        declared = {model.document["name"]: model.document for model in models}
+        report[name] = {
+            "missing": [n for n in declared if n not in existing],
+            "conflicting": [n for n in declared if n in existing and not _same_definition(declared[n], existing[n])],
+            "undeclared": [n for n in existing if n != "_id_" and n not in declared],
+        }
+    return report
+
+async def ensure_indexes() -> dict:
+    db = get_database()
+    report = await check_indexes()
+    for name, status in report.items():
+        models = [m for m in INDEXES[name] if m.document["name"] in status["missing"]]
+        status["created"] = []
+        if models:
+            try:
+                status["created"] = await db[name].create_indexes(models)
+                logger.info(f"Created indexes on {name}: {status['created']}")
+            except OperationFailure as e:
+                # e.g. duplicated values preventing a unique index
+                logger.error(f"Could not create indexes on {name}: {e}")
+        for index_name in status["conflicting"]:
+            logger.warning(f"Index {name}.{index_name} differs from its declaration; drop it to recreate")
+        for index_name in status["undeclared"]:
+            logger.warning(f"Index {name}.{index_name} is not declared in utils/indexes.py")
+    return report
+
+async def index_stats() -> dict:
+    db = get_database()
+    stats = {}
+    for name in INDEXES:
+        try:
+            sizes = {}
+            async for doc in await db[name].aggregate([{"$collStats": {"storageStats": {}}}]):
+                sizes.update(doc.get("storageStats", {}).get("indexSizes", {}))
+            indexes = []
+            async for doc in await db[name].aggregate([{"$indexStats": {}}]):
+                indexes.append({
+                    "name": doc["name"],
+                    "key": doc["key"],
+                    "size_bytes": sizes.get(doc["name"]),
+                    "accesses": doc["accesses"]["ops"],
+                    "since": doc["accesses"]["since"],
+                })
+            stats[name] = sorted(indexes, key=lambda i: i["name"])
+        except OperationFailure as e:
+            stats[name] = {"error": str(e)}
+    return stats
@@ -0,0 +1,175 @@
+import os
+import time
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Callable, Optional
+from pymongo.errors import OperationFailure, PyMongoError
+from utils.mongodb import get_database
+
+logger = logging.getLogger(__name__)
+
+# auto: change streams, polling if the deployment cannot provide them; poll: polling only; off
+CACHE_INVALIDATION = os.getenv("CACHE_INVALIDATION", "auto").lower()
+CACHE_INVALIDATION_POLL_INTERVAL = float(os.getenv("CACHE_INVALIDATION_POLL_INTERVAL", "5"))
+
+WATCHED_COLLECTIONS = ("roles", "estados_tarea", "estados_proyecto", "categorias_tarea", "tokens_revocados")
+
+# Server answers meaning change streams will never work on this deployment
+# (standalone server, $changeStream not allowed for this user)
+CHANGE_STREAMS_UNAVAILABLE = {40573, 13, 303}
+CHANGE_STREAM_HISTORY_LOST = 286
+
+_subscribers: dict[str, list[tuple[Callable[[Optional[str]], None], bool]]] = defaultdict(list)
+
+def subscribe(collection: str, callback: Callable[[Optional[str]], None], deletes: bool = True):
+    # callback(document_id); document_id is None when the whole collection may have changed.
+    # deletes=False skips single-document deletes, e.g. TTL expiries nobody needs to hear about
+    _subscribers[collection].append((callback, deletes))
+
+def publish(collection: str, document_id: Optional[str] = None, deleted: bool = False):
+    for callback, deletes in list(_subscribers[collection]):
+        if deleted and not deletes:
+            continue
+        try:
+            callback(document_id)
+        except Exception as e:
+            logger.error(f"Invalidation callback for {collection} failed: {e}")
+
+class InvalidationWatcher:
+    """Background task turning writes from any worker into local invalidations."""
+
+    def __init__(self, collections: tuple[str, ...] = WATCHED_COLLECTIONS, mode: str = CACHE_INVALIDATION, poll_interval: float = CACHE_INVALIDATION_POLL_INTERVAL):
+        self.collections = tuple(collections)
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.resume_token = None
+        self.active: Optional[str] = None
+        self.events = 0
+        self.errors = 0
+        self.last_event_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def start(self):
+        if self.mode == "off" or self._task is not None:
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        # The driver may absorb a cancellation during server selection; the flag ends the loops anyway
+        self._stopping = True
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.active = None
+
+    def _publish(self, collection: str, document_id: Optional[str] = None, deleted: bool = False):
+        self.events += 1
+        self.last_event_at = time.time()
+        publish(collection, document_id, deleted)
+
+    def _publish_all(self):
+        for collection in self.collections:
+            self._publish(collection)
+
+    async def _run(self):
+        if self.mode == "auto":
+            await self._watch()
+        if not self._stopping:
+            await self._poll()
+
+    async def _watch(self):
+        pipeline = [{"$match": {"ns.coll": {"$in": list(self.collections)}}}]
+        while not self._stopping:
+            try:
+                async with await get_database().watch(pipeline, resume_after=self.resume_token) as stream:
+                    # Known position even before the first event, so a reconnect misses nothing
+                    self.resume_token = stream.resume_token
+                    if self.active != "change_stream":
+                        logger.info(f"Watching {', '.join(self.collections)} for cache invalidation")
+                    self.active = "change_stream"
+                    async for change in stream:
+                        self._handle(change)
+                        self.resume_token = stream.resume_token
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAMS_UNAVAILABLE:
+                    logger.warning(f"Change streams unavailable ({e}); polling every {self.poll_interval}s instead")
+                    return
+                self.errors += 1
+                if e.code == CHANGE_STREAM_HISTORY_LOST:
+                    # Resume point fell off the oplog: whatever happened meanwhile is unknown
+                    logger.warning("Change stream history lost; invalidating every watched cache")
+                    self.resume_token = None
+                    self._publish_all()
+                else:
+                    logger.error(f"Change stream failed: {e}")
+                await asyncio.sleep(1)
+            except PyMongoError as e:
+                self.errors += 1
+                logger.error(f"Change stream interrupted, resuming: {e}")
+                await asyncio.sleep(1)
+
+    def _handle(self, change: dict):
+        collection = change.get("ns", {}).get("coll")
+        operation = change["operationType"]
+        if operation in ("insert", "update", "replace", "delete"):
+            self._publish(collection, str(change["documentKey"]["_id"]), deleted=operation == "delete")
+        elif collection:
+            # drop, rename, ...
+            self._publish(collection)
+
+    async def _poll(self):
+        self.active = "polling"
+        db = get_database()
+        state = {}
+        while not self._stopping:
+            for collection in self.collections:
+                try:
+                    state[collection] = await self._poll_collection(db[collection], state.get(collection))
+                except PyMongoError as e:
+                    self.errors += 1
+                    logger.error(f"Invalidation polling of {collection} failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _poll_collection(self, coll, previous: Optional[tuple]) -> tuple:
+        count = await coll.estimated_document_count()
+        if previous is None:
+            latest = await coll.find_one({"fecha_actualizacion": {"$exists": True}}, {"fecha_actualizacion": 1}, sort=[("fecha_actualizacion", -1)])
+            if latest is None:
+                return None, set(), count
+            return latest["fecha_actualizacion"], {latest["_id"]}, count
+
+        last_seen, seen_ids, last_count = previous
+        query = {"fecha_actualizacion": {"$gte": last_seen}} if last_seen else {"fecha_actualizacion": {"$exists": True}}
+        async for doc in coll.find(query, {"fecha_actualizacion": 1}).sort("fecha_actualizacion", 1):
+            updated = doc["fecha_actualizacion"]
+            if updated == last_seen and doc["_id"] in seen_ids:
+                continue
+            self._publish(coll.name, str(doc["_id"]))
+            if last_seen is None or updated > last_seen:
+                last_seen, seen_ids = updated, {doc["_id"]}
+            else:
+                seen_ids.add(doc["_id"])
+        if count != last_count:
+            # Deletes leave no fecha_actualizacion behind
+            self._publish(coll.name)
+        return last_seen, seen_ids, count
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "active": self.active,
+            "collections": list(self.collections),
+            "events": self.events,
+            "errors": self.errors,
+            "last_event_at": self.last_event_at,
+        }
+
+watcher = InvalidationWatcher()
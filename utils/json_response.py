@@ -0,0 +1,37 @@
+from decimal import Decimal
+from typing import Any, Sequence
+import orjson
+from bson import Decimal128, ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from utils.adapters import list_adapter
+
+def _default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    # As strings, like Pydantic does, so no digit is lost to a float
+    if isinstance(obj, Decimal128):
+        return str(obj.to_decimal())
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def json_dumps(content: Any) -> bytes:
+    # datetimes natively; UTC as "Z" to match Pydantic's output
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+json_loads = orjson.loads
+
+class MongoJSONResponse(JSONResponse):
+    """orjson response for raw Mongo documents: ObjectId, Decimal128 and datetime need no conversion."""
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
+
+def models_json(items: Sequence[BaseModel]) -> bytes:
+    # The whole list in one pass of Pydantic's serializer, the same path FastAPI takes for response_model
+    if not items:
+        return b"[]"
+    return list_adapter(type(items[0])).dump_json(list(items))
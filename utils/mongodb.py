@@ -1,7 +1,11 @@
 import os
+import time
+from collections import defaultdict
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient
+from pymongo.monitoring import ConnectionPoolListener
 from pymongo.server_api import ServerApi
+from utils.settings import load_mongo_settings
 
 load_dotenv()
 
@@ -13,29 +17,123 @@ if not DB:
 if not URI:
     raise ValueError("MongoDB URI not found. Set MONGODB_URI or URI environment variable")
 
+SETTINGS = load_mongo_settings()
+
+class PoolStats(ConnectionPoolListener):
+    def __init__(self):
+        self.servers = defaultdict(lambda: {
+            "open": 0,
+            "checked_out": 0,
+            "max_checked_out": 0,
+            "waiting": 0,
+            "max_waiting": 0,
+            "created": 0,
+            "closed": 0,
+            "checkouts": 0,
+            "checkout_failures": 0,
+            "checkout_wait_ms_total": 0.0,
+            "clears": 0,
+        })
+
+    def _server(self, event):
+        return self.servers[f"{event.address[0]}:{event.address[1]}"]
+
+    def pool_created(self, event):
+        self._server(event)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._server(event)["clears"] += 1
+
+    def pool_closed(self, event):
+        self.servers.pop(f"{event.address[0]}:{event.address[1]}", None)
+
+    def connection_created(self, event):
+        server = self._server(event)
+        server["created"] += 1
+        server["open"] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        server = self._server(event)
+        server["closed"] += 1
+        server["open"] = max(0, server["open"] - 1)
+
+    def connection_check_out_started(self, event):
+        server = self._server(event)
+        server["waiting"] += 1
+        server["max_waiting"] = max(server["max_waiting"], server["waiting"])
+
+    def connection_check_out_failed(self, event):
+        server = self._server(event)
+        server["waiting"] = max(0, server["waiting"] - 1)
+        server["checkout_failures"] += 1
+
+    def connection_checked_out(self, event):
+        server = self._server(event)
+        server["waiting"] = max(0, server["waiting"] - 1)
+        server["checked_out"] += 1
+        server["checkouts"] += 1
+        server["max_checked_out"] = max(server["max_checked_out"], server["checked_out"])
+        server["checkout_wait_ms_total"] += event.duration * 1000
+
+    def connection_checked_in(self, event):
+        server = self._server(event)
+        server["checked_out"] = max(0, server["checked_out"] - 1)
+
+_pool_stats = PoolStats()
+_started_at = time.time()
+
 _client = None
 
 def get_mongo_client():
     global _client
     if _client is None:
-        _client = MongoClient(
+        _client = AsyncMongoClient(
             URI,
             server_api=ServerApi("1"),
-            tls=True,
-            tlsAllowInvalidCertificates=True,
-            serverSelectionTimeoutMS=5000
+            event_listeners=[_pool_stats],
+            **SETTINGS.client_options()
         )
     return _client
 
-def get_collection(col):
+async def close_mongo_client():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+def get_database():
     client = get_mongo_client()
-    return client[DB][col]
+    return client[DB]
+
+def get_collection(col):
+    return get_database()[col]
+
+def pool_stats() -> dict:
+    servers = {}
+    for address, stats in _pool_stats.servers.items():
+        servers[address] = dict(stats)
+        checkouts = stats["checkouts"]
+        servers[address]["avg_checkout_wait_ms"] = round(stats["checkout_wait_ms_total"] / checkouts, 3) if checkouts else 0.0
+        del servers[address]["checkout_wait_ms_total"]
+    return {
+        "pid": os.getpid(),
+        "uptime_s": round(time.time() - _started_at),
+        "web_concurrency": os.getenv("WEB_CONCURRENCY"),
+        "settings": SETTINGS.model_dump(exclude={"uri"}),
+        "servers": servers,
+    }
 
-def t_connection():
+async def t_connection():
     try:
         client = get_mongo_client()
-        client.admin.command("ping")
+        await client.admin.command("ping")
         return True
     except Exception as e:
         print(f"Error connecting to MongoDB: {e}")
-        return False
\ No newline at end of file
+        return False
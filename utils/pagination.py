@@ -0,0 +1,89 @@
+import base64
+from datetime import datetime
+from typing import Optional
+from bson import ObjectId, json_util
+from fastapi import HTTPException
+from pymongo import ASCENDING, DESCENDING
+
+def parse_sort(sort: str, allowed: set[str]) -> list[tuple[str, int]]:
+    spec = []
+    for part in sort.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        direction = DESCENDING if part.startswith("-") else ASCENDING
+        field = part.lstrip("+-")
+        if field == "id":
+            field = "_id"
+        if field != "_id" and field not in allowed:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid sort field '{field}'. Allowed: {', '.join(sorted(allowed))}"
+            )
+        spec.append((field, direction))
+
+    if not spec:
+        raise HTTPException(status_code=400, detail="Sort parameter is empty")
+
+    # _id as tie-breaker keeps page boundaries stable when the sort key repeats
+    if all(field != "_id" for field, _ in spec):
+        spec.append(("_id", spec[-1][1]))
+    return spec
+
+def encode_cursor(values: list) -> str:
+    raw = json_util.dumps(values, json_options=json_util.CANONICAL_JSON_OPTIONS)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def _cursor_type(field: str) -> tuple:
+    if field == "_id":
+        return (ObjectId,)
+    if field.startswith("fecha_"):
+        return (datetime,)
+    return (str, int, float)
+
+def decode_cursor(token: str, sort_spec: list[tuple[str, int]]) -> list:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    if not isinstance(values, list) or len(values) != len(sort_spec):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    # Values go straight into the query: anything else (e.g. {"$ne": null}) would be an operator
+    for value, (field, _) in zip(values, sort_spec):
+        if not isinstance(value, _cursor_type(field)):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return values
+
+def keyset_filter(sort_spec: list[tuple[str, int]], values: list) -> dict:
+    # (a, b) after (x, y) in sort order: a beyond x, or a == x and b beyond y
+    branches = []
+    for i, (field, direction) in enumerate(sort_spec):
+        branch = {prev: values[j] for j, (prev, _) in enumerate(sort_spec[:i])}
+        branch[field] = {"$lt" if direction == DESCENDING else "$gt": values[i]}
+        branches.append(branch)
+    return {"$or": branches}
+
+def next_cursor(items: list, limit: int, sort_spec: list[tuple[str, int]]) -> Optional[str]:
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    values = []
+    for field, _ in sort_spec:
+        if field == "_id":
+            values.append(ObjectId(last.id))
+        else:
+            values.append(getattr(last, field))
+    return encode_cursor(values)
+
+def page_stages(match: Optional[dict], sort_spec: list[tuple[str, int]], skip: int = 0, limit: Optional[int] = None) -> list:
+    # Filtering and paging run before any $lookup so joins only touch one page
+    stages = []
+    if match:
+        stages.append({"$match": match})
+    stages.append({"$sort": dict(sort_spec)})
+    if skip:
+        stages.append({"$skip": skip})
+    if limit:
+        stages.append({"$limit": limit})
+    return stages
@@ -0,0 +1,44 @@
+from typing import Iterable, Optional
+
+# Bit i of the "perm" claim is PERMISOS[i]: only ever append, never reorder
+PERMISOS = (
+    "tareas:leer",
+    "tareas:escribir",
+    "tareas:desactivar",
+    "proyectos:leer",
+    "proyectos:escribir",
+    "proyectos:desactivar",
+    "usuarios:gestionar",
+    "catalogos:gestionar",
+    "admin",
+)
+
+PERMISO_BITS = {nombre: 1 << i for i, nombre in enumerate(PERMISOS)}
+
+# Roles stored without a permission list keep what they were granted before: everything for
+# "admin", and what validateuser allowed for any other non-empty role
+PERMISOS_POR_DEFECTO = ("tareas:leer", "tareas:escribir", "proyectos:leer", "proyectos:escribir")
+
+def permission_bit(nombre: str) -> int:
+    try:
+        return PERMISO_BITS[nombre]
+    except KeyError:
+        raise ValueError(f"Unknown permission '{nombre}'. Use: {', '.join(PERMISOS)}")
+
+def compile_permissions(nombres: Iterable[str]) -> int:
+    mask = 0
+    for nombre in nombres:
+        mask |= permission_bit(nombre)
+    return mask
+
+def default_permissions(nombre_rol: Optional[str]) -> int:
+    if not nombre_rol:
+        return 0
+    return compile_permissions(PERMISOS if nombre_rol == "admin" else PERMISOS_POR_DEFECTO)
+
+def has_permission(mask: int, nombre: str) -> bool:
+    return bool(mask & PERMISO_BITS[nombre])
+
+def missing_permissions(mask: int, held: int) -> list[str]:
+    # Permissions in mask that held lacks
+    return [nombre for nombre in PERMISOS if mask & PERMISO_BITS[nombre] and not held & PERMISO_BITS[nombre]]
@@ -0,0 +1,109 @@
+import logging
+from contextvars import ContextVar
+from typing import Optional
+from bson.timestamp import Timestamp
+from pymongo.read_preferences import (
+    Nearest,
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+)
+from utils.mongodb import SETTINGS, get_mongo_client
+
+logger = logging.getLogger(__name__)
+
+READ_MODES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+CAUSAL_HEADER = "x-causal-consistency"
+READ_AFTER_HEADER = "x-read-after"
+OPERATION_TIME_HEADER = "x-operation-time"
+
+_read_preference: ContextVar = ContextVar("read_preference", default=None)
+_session: ContextVar = ContextVar("mongo_session", default=None)
+
+def reader(coll):
+    # Collection handle for reads: applies the read preference chosen for this request
+    preference = _read_preference.get()
+    if preference is None:
+        return coll
+    return coll.with_options(read_preference=preference)
+
+def current_session():
+    return _session.get()
+
+def read_preference(mode: str = "secondaryPreferred", max_staleness_seconds: Optional[int] = None):
+    if mode not in READ_MODES:
+        raise ValueError(f"Unknown read preference '{mode}'. Use: {', '.join(READ_MODES)}")
+    if mode == "primary":
+        preference = Primary()
+    else:
+        staleness = SETTINGS.max_staleness_seconds if max_staleness_seconds is None else max_staleness_seconds
+        preference = READ_MODES[mode](max_staleness=staleness)
+
+    # async so the context variable is set in the request's own task
+    async def dependency():
+        _read_preference.set(preference)
+
+    return dependency
+
+secondary_reads = read_preference("secondaryPreferred")
+
+def encode_operation_time(timestamp: Timestamp) -> str:
+    return f"{timestamp.time}.{timestamp.inc}"
+
+def decode_operation_time(value: str) -> Optional[Timestamp]:
+    try:
+        seconds, increment = value.split(".")
+        return Timestamp(int(seconds), int(increment))
+    except (ValueError, TypeError):
+        return None
+
+class CausalConsistencyMiddleware:
+    """Opens a causally consistent session for requests that ask for one.
+
+    A client sends ``X-Causal-Consistency: true`` on a write and gets the
+    operation time back in ``X-Operation-Time``; echoing it as
+    ``X-Read-After`` on a later read makes even a secondary wait until it
+    has applied that write.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        read_after = headers.get(READ_AFTER_HEADER.encode())
+        wants_session = headers.get(CAUSAL_HEADER.encode(), b"").lower() in (b"1", b"true")
+        if not read_after and not wants_session:
+            return await self.app(scope, receive, send)
+
+        session = get_mongo_client().start_session(causal_consistency=True)
+        if read_after:
+            operation_time = decode_operation_time(read_after.decode("latin-1"))
+            if operation_time is not None:
+                session.advance_operation_time(operation_time)
+
+        async def send_with_operation_time(message):
+            if message["type"] == "http.response.start" and session.operation_time is not None:
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (OPERATION_TIME_HEADER.encode(), encode_operation_time(session.operation_time).encode())
+                ]
+            await send(message)
+
+        token = _session.set(session)
+        try:
+            await self.app(scope, receive, send_with_operation_time)
+        finally:
+            _session.reset(token)
+            await session.end_session()
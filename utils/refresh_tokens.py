@@ -0,0 +1,62 @@
+import os
+import hashlib
+import secrets
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from bson import ObjectId
+from fastapi import HTTPException, status
+from pymongo import ReturnDocument
+from utils.mongodb import get_collection
+
+logger = logging.getLogger(__name__)
+
+ACCESS_TOKEN_MINUTES = int(os.getenv("ACCESS_TOKEN_MINUTES", "15"))
+REFRESH_TOKEN_DAYS = int(os.getenv("REFRESH_TOKEN_DAYS", "30"))
+
+coll = get_collection("refresh_tokens")
+
+def _hash(token: str) -> str:
+    # Only the digest is stored: a leaked collection cannot be replayed
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+async def issue_refresh_token(usuario_id: str, familia: Optional[str] = None) -> str:
+    token = secrets.token_urlsafe(32)
+    now = datetime.now(timezone.utc)
+    await coll.insert_one({
+        "_id": _hash(token),
+        "usuario_id": ObjectId(usuario_id),
+        # Every rotation of one login shares the family, so reuse can revoke all of it
+        "familia": familia or secrets.token_hex(16),
+        "fecha_creacion": now,
+        "expira": now + timedelta(days=REFRESH_TOKEN_DAYS),
+        "usado": None
+    })
+    return token
+
+async def rotate_refresh_token(token: str) -> tuple[str, str]:
+    """Marks the token as used and returns (usuario_id, new refresh token)."""
+    now = datetime.now(timezone.utc)
+    token_hash = _hash(token)
+    doc = await coll.find_one_and_update(
+        {"_id": token_hash, "usado": None, "expira": {"$gt": now}},
+        {"$set": {"usado": now}},
+        return_document=ReturnDocument.BEFORE
+    )
+    if doc is None:
+        used = await coll.find_one({"_id": token_hash}, {"familia": 1, "usado": 1})
+        if used is not None and used.get("usado") is not None:
+            # A rotated token came back: someone holds a copy. Log the whole family out
+            result = await coll.delete_many({"familia": used["familia"]})
+            logger.warning(f"Refresh token reuse detected; revoked {result.deleted_count} tokens of its family")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired refresh token.")
+
+    usuario_id = str(doc["usuario_id"])
+    return usuario_id, await issue_refresh_token(usuario_id, doc["familia"])
+
+async def revoke_refresh_token(token: str) -> bool:
+    doc = await coll.find_one({"_id": _hash(token)}, {"familia": 1})
+    if doc is None:
+        return False
+    await coll.delete_many({"familia": doc["familia"]})
+    return True
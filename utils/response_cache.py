@@ -0,0 +1,187 @@
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from functools import wraps
+from typing import Optional
+from urllib.parse import urlencode
+from fastapi import Response
+from utils.invalidation import subscribe
+from utils.json_response import json_dumps, json_loads, models_json
+
+logger = logging.getLogger(__name__)
+
+# memory | redis | off
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower()
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+# Per-route overrides, e.g. RESPONSE_CACHE_TTLS="tareas=15,proyectos=120"
+RESPONSE_CACHE_TTLS = {
+    route.strip(): float(ttl)
+    for route, ttl in (item.split("=", 1) for item in os.getenv("RESPONSE_CACHE_TTLS", "").split(",") if item.strip())
+}
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+CATALOG_COLLECTIONS = ("roles", "estados_tarea", "estados_proyecto", "categorias_tarea")
+
+# Response headers worth replaying from the cache
+CACHED_HEADERS = ("x-next-cursor",)
+
+class MemoryBackend:
+    """Per-process LRU; generations only see writes made by this worker."""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def generations(self, names: tuple[str, ...]) -> list[int]:
+        return [self._generations.get(name, 0) for name in names]
+
+    async def bump(self, name: str):
+        self._generations[name] = self._generations.get(name, 0) + 1
+
+    def size(self) -> int:
+        return len(self._entries)
+
+class RedisBackend:
+    """Shared between workers; anything speaking the Redis protocol works."""
+
+    def __init__(self, url: str = REDIS_URL, prefix: str = "sgt:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise ValueError("RESPONSE_CACHE_BACKEND=redis needs the 'redis' package")
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.client.set(self.prefix + key, value, px=int(ttl * 1000))
+
+    async def generations(self, names: tuple[str, ...]) -> list[int]:
+        values = await self.client.mget([f"{self.prefix}gen:{name}" for name in names])
+        return [int(value) if value else 0 for value in values]
+
+    async def bump(self, name: str):
+        await self.client.incr(f"{self.prefix}gen:{name}")
+
+    def size(self) -> Optional[int]:
+        return None
+
+def _create_backend():
+    if RESPONSE_CACHE_BACKEND == "off":
+        return None
+    if RESPONSE_CACHE_BACKEND == "redis":
+        return RedisBackend()
+    if RESPONSE_CACHE_BACKEND == "memory":
+        return MemoryBackend()
+    raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND '{RESPONSE_CACHE_BACKEND}'. Use: memory, redis, off")
+
+backend = _create_backend()
+_stats = {"hits": 0, "misses": 0, "errors": 0, "bumps": 0}
+
+async def bump_generation(name: str):
+    # Every cached response depending on `name` becomes unreachable
+    if backend is None:
+        return
+    try:
+        await backend.bump(name)
+        _stats["bumps"] += 1
+    except Exception as e:
+        _stats["errors"] += 1
+        logger.error(f"Could not bump response cache generation for {name}: {e}")
+
+def _bump_on_change(name: str):
+    def callback(document_id):
+        try:
+            asyncio.get_running_loop().create_task(bump_generation(name))
+        except RuntimeError:
+            pass
+    return callback
+
+for _collection in CATALOG_COLLECTIONS:
+    # Lists embed catalog names; writes from other workers arrive through the invalidation bus
+    subscribe(_collection, _bump_on_change(_collection))
+
+async def _cache_key(route: str, depends: tuple[str, ...], request) -> str:
+    generations = await backend.generations(depends)
+    query = urlencode(sorted(request.query_params.multi_items()))
+    rol = getattr(request.state, "rol", "")
+    return f"{route}:{'.'.join(map(str, generations))}:{rol}:{query}"
+
+def _render(result, response: Optional[Response]) -> tuple[bytes, dict]:
+    if isinstance(result, Response):
+        body, source = result.body, result.headers
+    else:
+        body = models_json(result)
+        source = response.headers if response is not None else {}
+    headers = {name: source[name] for name in CACHED_HEADERS if name in source}
+    return body, headers
+
+def cache_response(route: str, depends: tuple[str, ...], ttl: float = RESPONSE_CACHE_TTL):
+    """Caches the JSON of a read route; goes under the auth decorator so the role is known."""
+    ttl = RESPONSE_CACHE_TTLS.get(route, ttl)
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = kwargs.get("request")
+            if backend is None or request is None:
+                return await func(*args, **kwargs)
+
+            try:
+                key = await _cache_key(route, depends, request)
+                cached = await backend.get(key)
+            except Exception as e:
+                _stats["errors"] += 1
+                logger.error(f"Response cache unavailable: {e}")
+                return await func(*args, **kwargs)
+
+            if cached is not None:
+                _stats["hits"] += 1
+                # Stored as "<headers JSON>\n<body>": the body is never re-encoded or parsed
+                header_line, body = cached.split(b"\n", 1)
+                return Response(content=body, media_type="application/json", headers={**json_loads(header_line), "X-Cache": "HIT"})
+
+            _stats["misses"] += 1
+            result = await func(*args, **kwargs)
+            body, headers = _render(result, kwargs.get("response"))
+            try:
+                await backend.set(key, json_dumps(headers) + b"\n" + body, ttl)
+            except Exception as e:
+                _stats["errors"] += 1
+                logger.error(f"Could not store cached response: {e}")
+            return Response(content=body, media_type="application/json", headers={**headers, "X-Cache": "MISS"})
+        return wrapper
+    return decorator
+
+def response_cache_stats() -> dict:
+    requests = _stats["hits"] + _stats["misses"]
+    return {
+        "backend": RESPONSE_CACHE_BACKEND,
+        "default_ttl_s": RESPONSE_CACHE_TTL,
+        "entries": backend.size() if backend is not None else 0,
+        "hit_ratio": round(_stats["hits"] / requests, 3) if requests else 0.0,
+        **_stats,
+    }
@@ -0,0 +1,163 @@
+import os
+import math
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+from pymongo.errors import PyMongoError
+from utils.mongodb import get_collection
+from utils.invalidation import subscribe
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "10000"))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+# Bloom filters cannot forget: rebuilt periodically so expired jtis stop taking space
+REVOCATION_REBUILD_INTERVAL = float(os.getenv("REVOCATION_REBUILD_INTERVAL", "600"))
+
+COLLECTION = "tokens_revocados"
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing: k positions out of one 128-bit digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+class RevocationList:
+    """Revoked jtis, answered from a per-worker Bloom filter; only its positives reach Mongo."""
+
+    def __init__(self, capacity: int = REVOCATION_BLOOM_CAPACITY, error_rate: float = REVOCATION_BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._filter = BloomFilter(capacity, error_rate)
+        # Positives the store already answered, so a false positive costs one lookup, not one per request
+        self._confirmed: dict[str, bool] = {}
+        self._loaded = False
+        self._added_while_loading: Optional[set[str]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.checks = 0
+        self.filter_hits = 0
+        self.false_positives = 0
+        self.revoked_hits = 0
+        # TTL deletes only mean a token expired; the periodic rebuild drops them from the filter
+        subscribe(COLLECTION, self._on_change, deletes=False)
+
+    def _on_change(self, jti: Optional[str]):
+        if jti is None:
+            try:
+                asyncio.get_running_loop().create_task(self._safe_load())
+            except RuntimeError:
+                pass
+            return
+        self.add(jti)
+
+    def add(self, jti: str):
+        self._filter.add(jti)
+        self._confirmed.pop(jti, None)
+        if self._added_while_loading is not None:
+            self._added_while_loading.add(jti)
+
+    async def load(self):
+        # Revocations arriving mid-scan may be missing from it; they are carried over to the new filter
+        self._added_while_loading = set()
+        try:
+            jtis = []
+            async for doc in get_collection(COLLECTION).find({"expira": {"$gt": datetime.now(timezone.utc)}}, {"_id": 1}):
+                jtis.append(doc["_id"])
+            bloom = BloomFilter(max(self.capacity, 2 * len(jtis)), self.error_rate)
+            for jti in [*jtis, *self._added_while_loading]:
+                bloom.add(jti)
+        finally:
+            self._added_while_loading = None
+        self._filter = bloom
+        self._confirmed = {}
+        self._loaded = True
+
+    async def _safe_load(self):
+        try:
+            await self.load()
+        except PyMongoError as e:
+            logger.error(f"Could not load revoked tokens: {e}")
+
+    async def _run(self):
+        while not self._stopping:
+            await self._safe_load()
+            await asyncio.sleep(REVOCATION_REBUILD_INTERVAL if self._loaded else 5)
+
+    def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping = True
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def is_revoked(self, jti: str) -> bool:
+        self.checks += 1
+        if self._loaded and jti not in self._filter:
+            return False
+        if jti in self._confirmed:
+            revoked = self._confirmed[jti]
+        else:
+            # Filter positive (or no filter yet): ask the store
+            revoked = await get_collection(COLLECTION).find_one({"_id": jti}, {"_id": 1}) is not None
+            self._confirmed[jti] = revoked
+        if self._loaded:
+            self.filter_hits += 1
+            if not revoked:
+                self.false_positives += 1
+        if revoked:
+            self.revoked_hits += 1
+        return revoked
+
+    async def revoke(self, jti: str, expira: datetime, usuario_id: Optional[str] = None):
+        now = datetime.now(timezone.utc)
+        await get_collection(COLLECTION).update_one(
+            {"_id": jti},
+            {"$setOnInsert": {"expira": expira, "usuario_id": usuario_id, "fecha_actualizacion": now}},
+            upsert=True
+        )
+        # Other workers learn about it from the invalidation watcher
+        self.add(jti)
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self._loaded,
+            "entries": self._filter.count,
+            "capacity": self._filter.capacity,
+            "bits": self._filter.size,
+            "hashes": self._filter.hashes,
+            "checks": self.checks,
+            "filter_hits": self.filter_hits,
+            "false_positives": self.false_positives,
+            "revoked_hits": self.revoked_hits,
+        }
+
+revocation_list = RevocationList()
@@ -1,12 +1,19 @@
 import os
+import uuid
 from typing import Optional
 import jwt  
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException, Depends, Request, status
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.datastructures import Headers
 from dotenv import load_dotenv
 from jwt import PyJWTError 
 from functools import wraps
+from utils.token_cache import token_cache
+from utils.permissions import default_permissions, has_permission, permission_bit
+from utils.catalog_cache import CATALOGS
+from utils.revocation import revocation_list
 
 load_dotenv()
 
@@ -19,7 +26,10 @@ def create_jwt_token(
     nombre: str,       
     rol: str,          
     
-    expires_delta: Optional[timedelta] = None
+    expires_delta: Optional[timedelta] = None,
+    permisos: Optional[int] = None,
+    rol_id: Optional[str] = None,
+    rol_version: Optional[int] = None
 ) -> str:
     if expires_delta:
         expiration = datetime.utcnow() + expires_delta
@@ -31,118 +41,48 @@ def create_jwt_token(
         "email": email,
         "nombre": nombre,  
         "rol": rol,
+        "perm": default_permissions(rol) if permisos is None else permisos,
         "exp": expiration,
-        "iat": datetime.utcnow()
+        "iat": datetime.utcnow(),
+        # Lets a single token be revoked before it expires
+        "jti": uuid.uuid4().hex
     }
+    if rol_id is not None:
+        token_payload["rid"] = rol_id
+        token_payload["rv"] = rol_version
     
     encoded_jwt = jwt.encode(token_payload, SECRET_KEY, algorithm="HS256")
     return encoded_jwt
 
-def validateuser(func):
-    @wraps(func)
-    async def wrapper(*args, **kwargs):
-        request = kwargs.get('request')
-        if not request:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Request object not found in decorator.")
-
-        authorization: str = request.headers.get("Authorization")
-        if not authorization:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authorization header missing.")
-
-        try:
-            scheme, token = authorization.split()
-            if scheme.lower() != "bearer":
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication scheme. Must be Bearer.")
-        except ValueError:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Authorization header format.")
-
-        try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-
-            user_id = payload.get("id")
-            email = payload.get("email")
-            nombre = payload.get("nombre") 
-            rol = payload.get("rol")
-            exp = payload.get("exp")
-
-            if user_id is None or email is None:
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token payload invalid: Missing user ID or email.")
-
-            if datetime.utcfromtimestamp(exp) < datetime.utcnow():
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Expired token.")
-
-            if not rol:
-                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user.")
-            
-            request.state.id = user_id
-            request.state.email = email
-            request.state.nombre = nombre
-            request.state.rol = rol
-            request.state.admin = (rol == "admin")
-
-        except PyJWTError as e: 
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid token or expired token: {e}")
-        except Exception as e:
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Server error during token validation: {e}")
-
-        return await func(*args, **kwargs)
-    return wrapper
-
-def validateadmin(func):
-    @wraps(func)
-    async def wrapper(*args, **kwargs):
-        request = kwargs.get('request')
-        if not request:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Request object not found in decorator.")
+def decode_token(token: str) -> dict:
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+        token_cache.put(token, payload)
+    return payload
 
-        authorization: str = request.headers.get("Authorization")
-        if not authorization:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authorization header missing.")
+async def role_is_current(rol_id: str, version: Optional[int]) -> bool:
+    # Served from the in-memory roles catalog, which update_rol invalidates on every worker
+    roles = CATALOGS.get("roles")
+    if roles is None:
+        return True
+    rol = await roles.get(rol_id)
+    return rol is not None and rol.version == version
 
-        try:
-            scheme, token = authorization.split()
-            if scheme.lower() != "bearer":
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication scheme. Must be Bearer.")
-        except ValueError:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Authorization header format.")
+async def authenticate(authorization: Optional[str], admin: bool = False) -> dict:
+    if not authorization:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authorization header missing.")
 
-        try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-
-            user_id = payload.get("id")
-            email = payload.get("email")
-            nombre = payload.get("nombre")
-            rol = payload.get("rol")
-            exp = payload.get("exp")
-
-            if user_id is None or email is None:
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token payload invalid: Missing user ID or email.")
-
-            if datetime.utcfromtimestamp(exp) < datetime.utcnow():
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Expired token.")
-
-            if rol != "admin":
-                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is not an administrator.")
-            
-            request.state.id = user_id
-            request.state.email = email
-            request.state.nombre = nombre
-            request.state.rol = rol
-            request.state.admin = True
-
-        except PyJWTError as e:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid token or expired token: {e}")
-        except Exception as e:
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Server error during admin token validation: {e}")
-
-        return await func(*args, **kwargs)
-    return wrapper
+    try:
+        scheme, token = authorization.split()
+        if scheme.lower() != "bearer":
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication scheme. Must be Bearer.")
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Authorization header format.")
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
-    token = credentials.credentials
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        
+        payload = decode_token(token)
+
         user_id = payload.get("id")
         email = payload.get("email")
         nombre = payload.get("nombre")
@@ -150,24 +90,138 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         exp = payload.get("exp")
 
         if user_id is None or email is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token Invalid: Missing user info.")
-        
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token payload invalid: Missing user ID or email.")
+
         if datetime.utcfromtimestamp(exp) < datetime.utcnow():
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Expired token.")
-        
+
+        # Tokens issued before the perm claim existed get what their role name granted
+        permisos = payload.get("perm")
+        if permisos is None:
+            permisos = default_permissions(rol)
+
+        if admin and not has_permission(permisos, "admin"):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is not an administrator.")
+
+        if not rol:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user.")
+
+        if "rid" in payload and not await role_is_current(payload["rid"], payload.get("rv")):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Role changed since the token was issued; refresh it.")
+
+        jti = payload.get("jti")
+        if jti and await revocation_list.is_revoked(jti):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked.")
+
         return {
             "id": user_id,
             "email": email,
             "nombre": nombre,
             "rol": rol,
-            "admin": (rol == "admin")
+            "permisos": permisos,
+            "admin": has_permission(permisos, "admin"),
+            "jti": jti,
+            "exp": exp
         }
-            
+
+    except HTTPException:
+        raise
     except PyJWTError as e:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid token: {e}")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid token or expired token: {e}")
     except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Server error during token dependency validation: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Server error during token validation: {e}")
+
+# Reachable without a token; everything else is authenticated before the body is read
+PUBLIC_PATHS = {"/", "/health", "/ready", "/login", "/login/firebase", "/token/refresh", "/docs", "/docs/oauth2-redirect", "/redoc", "/openapi.json"}
+
+class AuthenticationMiddleware:
+    """Checks the bearer token from the headers alone and leaves the user in request.state."""
+
+    def __init__(self, app, public_paths: set[str] = PUBLIC_PATHS):
+        self.app = app
+        self.public_paths = public_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in self.public_paths:
+            await self.app(scope, receive, send)
+            return
+
+        authorization = Headers(scope=scope).get("authorization")
+        try:
+            user = await authenticate(authorization)
+        except HTTPException as e:
+            # Rejected without ever calling receive(): the body stays unread
+            headers = {"WWW-Authenticate": "Bearer"} if e.status_code == status.HTTP_401_UNAUTHORIZED else None
+            response = JSONResponse({"detail": e.detail}, status_code=e.status_code, headers=headers)
+            await response(scope, receive, send)
+            return
+
+        scope.setdefault("state", {}).update(user)
+        await self.app(scope, receive, send)
+
+async def _authenticated_user(request: Request, admin: bool = False) -> dict:
+    if getattr(request.state, "id", None) is None:
+        # App mounted without the middleware: authenticate here instead
+        user = await authenticate(request.headers.get("Authorization"), admin)
+        for key, value in user.items():
+            setattr(request.state, key, value)
+    elif admin and not request.state.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is not an administrator.")
+    return {key: getattr(request.state, key) for key in ("id", "email", "nombre", "rol", "permisos", "admin", "jti", "exp")}
+
+async def require_user(request: Request) -> dict:
+    return await _authenticated_user(request)
+
+async def require_admin(request: Request) -> dict:
+    return await _authenticated_user(request, admin=True)
+
+def require_permission(permiso: str):
+    # Resolved once here so a typo fails at import time, not on the first request
+    bit = permission_bit(permiso)
+
+    async def dependency(request: Request) -> dict:
+        user = await _authenticated_user(request)
+        if not user["permisos"] & bit:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Missing permission '{permiso}'.")
+        return user
+    return dependency
+
+def validateuser(func):
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        request = kwargs.get('request')
+        if not request:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Request object not found in decorator.")
+        await _authenticated_user(request)
+        return await func(*args, **kwargs)
+    return wrapper
+
+def validateadmin(func):
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        request = kwargs.get('request')
+        if not request:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Request object not found in decorator.")
+        await _authenticated_user(request, admin=True)
+        return await func(*args, **kwargs)
+    return wrapper
 
+async def revoke_access_token(token: str) -> dict:
+    try:
+        # Expired tokens are already useless; the signature still has to be ours
+        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"], options={"verify_exp": False})
+    except PyJWTError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid token: {e}")
+    jti = payload.get("jti")
+    if not jti:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Token has no jti and cannot be revoked; it stays valid until it expires.")
+    expira = datetime.fromtimestamp(payload["exp"], timezone.utc)
+    await revocation_list.revoke(jti, expira, payload.get("id"))
+    return {"jti": jti, "expira": expira}
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    # Same checks as the middleware: revocation and role version included
+    return await authenticate(f"Bearer {credentials.credentials}")
 
 async def get_current_admin_user(current_user: dict = Depends(get_current_user)) -> dict:
     if not current_user.get("admin"):
@@ -0,0 +1,106 @@
+import os
+import importlib.util
+from typing import Optional
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
+
+load_dotenv()
+
+# Wire compressors and the module PyMongo needs for each one
+COMPRESSOR_MODULES = {
+    "zstd": "zstandard",
+    "snappy": "snappy",
+    "zlib": "zlib",
+}
+
+class MongoSettings(BaseModel):
+    uri: str = Field(min_length=1)
+    database: str = Field(min_length=1)
+    max_pool_size: int = Field(default=100, ge=1)
+    min_pool_size: int = Field(default=0, ge=0)
+    max_idle_time_ms: Optional[int] = Field(default=None, ge=1)
+    wait_queue_timeout_ms: Optional[int] = Field(default=None, ge=1)
+    socket_timeout_ms: Optional[int] = Field(default=None, ge=1)
+    connect_timeout_ms: int = Field(default=20000, ge=1)
+    server_selection_timeout_ms: int = Field(default=5000, ge=1)
+    compressors: list[str] = Field(default_factory=lambda: ["zlib"])
+    zlib_compression_level: int = Field(default=-1, ge=-1, le=9)
+    max_staleness_seconds: int = Field(default=90, ge=-1)
+    tls: bool = True
+
+    @field_validator("compressors", mode="before")
+    @classmethod
+    def split_compressors(cls, value):
+        if isinstance(value, str):
+            return [c.strip().lower() for c in value.split(",") if c.strip()]
+        return value
+
+    @field_validator("compressors")
+    @classmethod
+    def check_compressors(cls, value: list[str]):
+        for compressor in value:
+            if compressor not in COMPRESSOR_MODULES:
+                raise ValueError(f"Unknown compressor '{compressor}'. Use: {', '.join(COMPRESSOR_MODULES)}")
+            if importlib.util.find_spec(COMPRESSOR_MODULES[compressor]) is None:
+                raise ValueError(f"Compressor '{compressor}' needs the '{COMPRESSOR_MODULES[compressor]}' package")
+        return value
+
+    @field_validator("max_staleness_seconds")
+    @classmethod
+    def check_max_staleness(cls, value: int):
+        # MongoDB rejects staleness bounds under 90 seconds; -1 means no bound
+        if value != -1 and value < 90:
+            raise ValueError("Must be -1 (no limit) or at least 90 seconds")
+        return value
+
+    @model_validator(mode="after")
+    def check_pool_bounds(self):
+        if self.min_pool_size > self.max_pool_size:
+            raise ValueError("MONGODB_MIN_POOL_SIZE cannot be greater than MONGODB_MAX_POOL_SIZE")
+        return self
+
+    def client_options(self) -> dict:
+        options = {
+            "tls": self.tls,
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+        }
+        if self.tls:
+            options["tlsAllowInvalidCertificates"] = True
+        if self.max_idle_time_ms is not None:
+            options["maxIdleTimeMS"] = self.max_idle_time_ms
+        if self.wait_queue_timeout_ms is not None:
+            options["waitQueueTimeoutMS"] = self.wait_queue_timeout_ms
+        if self.socket_timeout_ms is not None:
+            options["socketTimeoutMS"] = self.socket_timeout_ms
+        if self.compressors:
+            options["compressors"] = ",".join(self.compressors)
+            if "zlib" in self.compressors:
+                options["zlibCompressionLevel"] = self.zlib_compression_level
+        return options
+
+MONGO_ENV = {
+    "uri": "MONGODB_URI",
+    "database": "DATABASE_NAME",
+    "max_pool_size": "MONGODB_MAX_POOL_SIZE",
+    "min_pool_size": "MONGODB_MIN_POOL_SIZE",
+    "max_idle_time_ms": "MONGODB_MAX_IDLE_TIME_MS",
+    "wait_queue_timeout_ms": "MONGODB_WAIT_QUEUE_TIMEOUT_MS",
+    "socket_timeout_ms": "MONGODB_SOCKET_TIMEOUT_MS",
+    "connect_timeout_ms": "MONGODB_CONNECT_TIMEOUT_MS",
+    "server_selection_timeout_ms": "MONGODB_SERVER_SELECTION_TIMEOUT_MS",
+    "compressors": "MONGODB_COMPRESSORS",
+    "zlib_compression_level": "MONGODB_ZLIB_COMPRESSION_LEVEL",
+    "max_staleness_seconds": "MONGODB_MAX_STALENESS_SECONDS",
+    "tls": "MONGODB_TLS",
+}
+
+def load_mongo_settings() -> MongoSettings:
+    values = {field: os.getenv(env) for field, env in MONGO_ENV.items() if os.getenv(env) is not None}
+    try:
+        return MongoSettings(**values)
+    except ValidationError as e:
+        errors = "; ".join(f"{MONGO_ENV[str(err['loc'][0])] if err['loc'] else 'MongoDB settings'}: {err['msg']}" for err in e.errors())
+        raise ValueError(f"Invalid MongoDB configuration: {errors}")
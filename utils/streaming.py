@@ -0,0 +1,56 @@
+import os
+import logging
+from typing import AsyncIterator
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+# Takes a cursor the controller has already opened: opening it before the response starts
+# keeps connection errors a 500 instead of a stream cut short after a 200
+async def cursor_items(cursor, model: type[BaseModel]) -> AsyncIterator[BaseModel]:
+    try:
+        async for doc in cursor:
+            yield model(**doc)
+    finally:
+        # also runs when the client disconnects mid-export
+        await cursor.close()
+
+async def _chunks(items: AsyncIterator[BaseModel], export_format: str, batch_size: int) -> AsyncIterator[bytes]:
+    # One chunk per cursor batch: memory stays at one batch and the first
+    # byte goes out as soon as the first batch is serialized
+    ndjson = export_format == "ndjson"
+    buffer = [] if ndjson else [b"["]
+    count = 0
+    try:
+        async for item in items:
+            if not ndjson and count:
+                buffer.append(b",")
+            buffer.append(item.model_dump_json().encode("utf-8"))
+            if ndjson:
+                buffer.append(b"\n")
+            count += 1
+            if count % batch_size == 0:
+                yield b"".join(buffer)
+                buffer = []
+    except Exception as e:
+        # Headers are already sent; the truncated body is the only signal left
+        logger.error(f"Export interrupted after {count} documents: {e}")
+        raise
+    if not ndjson:
+        buffer.append(b"]")
+    if buffer:
+        yield b"".join(buffer)
+
+def streaming_response(items: AsyncIterator[BaseModel], export_format: str, batch_size: int = EXPORT_BATCH_SIZE) -> StreamingResponse:
+    return StreamingResponse(
+        _chunks(items, export_format, batch_size),
+        media_type=EXPORT_FORMATS[export_format]
+    )
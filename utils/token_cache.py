@@ -0,0 +1,68 @@
+import os
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Optional
+
+JWT_CACHE_ENABLED = os.getenv("JWT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "1024"))
+
+class TokenCache:
+    """Claims of already verified tokens, keyed by the token digest and kept until exp."""
+
+    def __init__(self, max_entries: int = JWT_CACHE_SIZE, enabled: bool = JWT_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: OrderedDict[bytes, dict] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        # The digest, not the token, so a memory dump does not hand out credentials
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        key = self._key(token)
+        claims = self._entries.get(key)
+        if claims is None:
+            self.misses += 1
+            return None
+        if claims["exp"] <= time.time():
+            # Never served past exp: the caller re-verifies and gets the expiry error
+            del self._entries[key]
+            self.expired += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(claims)
+
+    def put(self, token: str, claims: dict):
+        if not self.enabled or not isinstance(claims.get("exp"), (int, float)):
+            return
+        self._entries[self._key(token)] = dict(claims)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.expired
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+token_cache = TokenCache()